@@ -0,0 +1,389 @@
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import dates
+from columnar import CompletionStore
+from database import TrainingDatabase
+from index import FiscalYearIndex
+from ingest import read_training_records
+from main import (
+    aggregate_training_programs,
+    has_completed_training_program,
+    count_program_completions,
+    date_from_string,
+    is_within_fiscal_year,
+    generate_completion_report_by_year,
+    index_expired_programs,
+    index_expiring_programs,
+    generate_expiration_report_by_date,
+    ReportEngine
+)
+from synthetic import (
+    add_generator_arguments,
+    generate_training_records,
+    generator_options,
+    write_training_records
+)
+
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+
+
+def run_report_functions(training_records, fiscal_year, expiration):
+    '''
+    Builds all three reports with the individual report functions, which
+    scan the training records once per report (and once per program).
+    '''
+    training_programs = aggregate_training_programs(training_records)
+    return (
+        count_program_completions(training_programs, training_records),
+        generate_completion_report_by_year(
+            training_records, fiscal_year, training_programs),
+        generate_expiration_report_by_date(training_records, expiration)
+    )
+
+
+def run_report_engine(training_records, fiscal_year, expiration):
+    '''
+    Builds all three reports with a single pass of the report engine.
+    '''
+    engine = ReportEngine(fiscal_year, expiration).add_records(
+        training_records)
+    return (
+        engine.completion_totals(),
+        engine.completion_report_by_year(),
+        engine.expiration_report()
+    )
+
+
+def scale_records(training_records, scale):
+    '''
+    Returns the training records repeated scale times, each copy with
+    distinct employee names.
+    '''
+    if scale == 1:
+        return training_records
+    return [
+        {**record, 'name': f'{record["name"]} {copy}'}
+        for copy in range(scale)
+        for record in training_records
+    ]
+
+
+def traced_memory(function, *args):
+    '''
+    Returns the memory in bytes that is still allocated by the result
+    of the function, together with the result.
+    '''
+    tracemalloc.start()
+    try:
+        result = function(*args)
+        memory = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return memory, result
+
+
+def best_of(repeat, function, *args):
+    '''
+    Runs the function repeatedly and returns the fastest wall time in
+    seconds together with the result of the last run.
+    '''
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def benchmarks(training_records, fiscal_year, expiration):
+    '''
+    Returns:
+        dict: index of benchmark names and functions without arguments that
+        run a public function of main.py over all training records
+    '''
+    training_programs = aggregate_training_programs(training_records)
+    completions = [
+        completion
+        for record in training_records
+        for completion in record.get('completions', [])
+    ]
+    timestamps = [completion.get('timestamp') for completion in completions]
+    expiration_date = date_from_string(expiration)
+
+    def date_from_string_uncached():
+        dates.cache_clear()
+        for timestamp in timestamps:
+            date_from_string(timestamp)
+
+    return {
+        'aggregate_training_programs': lambda: aggregate_training_programs(
+            training_records),
+        'has_completed_training_program': lambda: [
+            has_completed_training_program(
+                training_programs[0], record.get('completions', []))
+            for record in training_records
+        ],
+        'count_program_completions': lambda: count_program_completions(
+            training_programs, training_records),
+        'date_from_string': date_from_string_uncached,
+        'is_within_fiscal_year': lambda: [
+            is_within_fiscal_year(fiscal_year, timestamp)
+            for timestamp in timestamps
+        ],
+        'generate_completion_report_by_year': lambda: (
+            generate_completion_report_by_year(
+                training_records, fiscal_year, training_programs)),
+        'FiscalYearIndex': lambda: FiscalYearIndex(
+            training_records).completion_report_by_year(
+                fiscal_year, training_programs),
+        'index_expired_programs': lambda: [
+            index_expired_programs(
+                record.get('completions', []), expiration_date)
+            for record in training_records
+        ],
+        'index_expiring_programs': lambda: [
+            index_expiring_programs(
+                record.get('completions', []), expiration_date, 30)
+            for record in training_records
+        ],
+        'generate_expiration_report_by_date': lambda: (
+            generate_expiration_report_by_date(training_records, expiration)),
+        'ReportEngine': lambda: run_report_engine(
+            training_records, fiscal_year, expiration),
+    }
+
+
+def run_main(input_file, fiscal_year, expiration):
+    '''
+    Runs main.py end-to-end in a separate process, writing the reports
+    to a temporary directory.
+    '''
+    with tempfile.TemporaryDirectory() as directory:
+        subprocess.run(
+            [sys.executable, MAIN, '-i', os.path.abspath(input_file),
+             '-y', str(fiscal_year), '-x', expiration],
+            cwd=directory, check=True
+        )
+
+
+def git_commit():
+    '''
+    Returns:
+        str: commit hash of the working tree, None outside of a git checkout
+    '''
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+            cwd=os.path.dirname(MAIN), check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(args):
+    '''
+    Times every public function of main.py and main.py end-to-end on
+    synthetic training records of each size.
+
+    Returns:
+        dict: machine readable benchmark results
+    '''
+    results = []
+    for employees in args.sizes:
+        training_records = list(generate_training_records(
+            employees, **generator_options(args)))
+        completions = sum(
+            len(record['completions']) for record in training_records)
+
+        functions = benchmarks(
+            training_records, args.fiscal_year, args.expiration)
+        with tempfile.TemporaryDirectory() as directory:
+            input_file = os.path.join(directory, 'trainings.json')
+            write_training_records(input_file, training_records)
+            functions['main'] = lambda: run_main(
+                input_file, args.fiscal_year, args.expiration)
+
+            for name, function in functions.items():
+                seconds, _ = best_of(args.repeat, function)
+                results.append({
+                    'employees': employees,
+                    'completions': completions,
+                    'function': name,
+                    'seconds': seconds
+                })
+                print(f'{employees:>10} {name:<40}{seconds * 1000:12.2f} ms',
+                      file=sys.stderr)
+
+    return {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': {
+            'fiscal_year': args.fiscal_year,
+            'expiration': args.expiration,
+            'repeat': args.repeat,
+            **generator_options(args)
+        },
+        'results': results
+    }
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='''
+        Compares the run time of the individual report functions with the
+        single pass report engine, or with --columnar the memory usage and
+        run time of the list of training records with the completion store,
+        or with --sqlite the run time with the SQLite database.
+        With --suite all public functions are timed on synthetic training
+        records of several sizes.
+    ''')
+    parser.add_argument('-i', '--input_file', type=str,
+                        default='trainings.json',
+                        help='Path to a training records JSON file.')
+    parser.add_argument('-y', '--fiscal_year', type=int, default=2024,
+                        help='The fiscal year for the completion report.')
+    parser.add_argument('-x', '--expiration', type=str, default='10/1/2023',
+                        help='The expiration date for the expiration report.')
+    parser.add_argument('-r', '--repeat', type=int, default=3,
+                        help='Number of runs, the fastest run is reported.')
+    parser.add_argument('-s', '--scale', type=int, default=1,
+                        help='Repeat the training records n times.')
+    parser.add_argument('--columnar', action='store_true',
+                        help='''Compare the list of training records with the
+                        columnar completion store instead.''')
+    parser.add_argument('--sqlite', action='store_true',
+                        help='''Compare the list of training records with the
+                        SQLite database instead.''')
+    parser.add_argument('--suite', action='store_true',
+                        help='''Time all public functions of main.py and
+                        main.py end-to-end on synthetic training records
+                        instead, and write the results as JSON.''')
+    parser.add_argument('--sizes', type=lambda value: [
+                            int(float(size)) for size in value.split(',')],
+                        default=[10**3, 10**4, 10**5, 10**6],
+                        help='''Comma separated numbers of employees of the
+                        synthetic training records, defaults to
+                        1e3,1e4,1e5,1e6.''')
+    parser.add_argument('-o', '--output_file', type=str,
+                        help='''Path to the JSON results of the suite,
+                        defaults to standard output.''')
+    add_generator_arguments(parser)
+    return parser.parse_args()
+
+
+def compare_columnar(training_records, args):
+    '''
+    Compares memory usage and report run time of the list of training
+    records with the columnar completion store.
+    '''
+    text = json.dumps(training_records)
+    del training_records
+
+    records_memory, training_records = traced_memory(json.loads, text)
+    store_memory, store = traced_memory(
+        CompletionStore, read_training_records(io.StringIO(text)))
+
+    records_time, expected = best_of(
+        args.repeat, run_report_functions,
+        training_records, args.fiscal_year, args.expiration)
+    store_time, result = best_of(
+        args.repeat, run_report_functions,
+        store, args.fiscal_year, args.expiration)
+
+    print(f'{"":<20}{"memory":>12}{"run time":>14}')
+    for name, memory, seconds in (
+            ('training records', records_memory, records_time),
+            ('completion store', store_memory, store_time)):
+        print(f'{name:<20}{memory / 2**20:9.2f} MB{seconds * 1000:11.2f} ms')
+    print(f'{"ratio":<20}{records_memory / store_memory:11.2f}x'
+          f'{records_time / store_time:13.2f}x')
+
+    return result, expected
+
+
+def compare_sqlite(training_records, args):
+    '''
+    Compares report run time of the list of training records with the
+    indexed queries of the SQLite database.
+    '''
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        database = TrainingDatabase(os.path.join(directory, 'trainings.db'))
+        database.add_records(training_records)
+        import_time = time.perf_counter() - start
+
+        records_time, expected = best_of(
+            args.repeat, run_report_functions,
+            training_records, args.fiscal_year, args.expiration)
+        database_time, result = best_of(
+            args.repeat, run_report_functions,
+            database, args.fiscal_year, args.expiration)
+        database.close()
+
+    for name, seconds in (('import', import_time),
+                          ('training records', records_time),
+                          ('database', database_time)):
+        print(f'{name:<20}{seconds * 1000:10.2f} ms')
+    print(f'{"speedup":<20}{records_time / database_time:10.2f}x')
+
+    return result, expected
+
+
+def compare_engine(training_records, args):
+    '''
+    Compares report run time of the individual report functions with the
+    single pass report engine.
+    '''
+    functions_time, expected = best_of(
+        args.repeat, run_report_functions,
+        training_records, args.fiscal_year, args.expiration)
+    engine_time, result = best_of(
+        args.repeat, run_report_engine,
+        training_records, args.fiscal_year, args.expiration)
+
+    for name, seconds in (('report functions', functions_time),
+                          ('report engine', engine_time)):
+        print(f'{name:<20}{seconds * 1000:10.2f} ms')
+    print(f'{"speedup":<20}{functions_time / engine_time:10.2f}x')
+
+    return result, expected
+
+
+def main():
+    args = parse_arguments()
+    if args.suite:
+        results = run_suite(args)
+        if args.output_file:
+            with open(args.output_file, 'w') as file:
+                json.dump(results, file, indent=4)
+        else:
+            print(json.dumps(results, indent=4))
+        return
+
+    with open(args.input_file, 'r') as file:
+        training_records = scale_records(json.load(file), args.scale)
+
+    compare = compare_engine
+    if args.columnar:
+        compare = compare_columnar
+    elif args.sqlite:
+        compare = compare_sqlite
+    result, expected = compare(training_records, args)
+
+    if json.dumps(result) != json.dumps(expected):
+        print('error: reports differ')
+        exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+import hashlib
+import os
+
+from columnar import CompletionStore
+from ingest import iter_training_records
+from sections import read_sections, write_sections
+
+MAGIC = b'RINNOTRN'
+# 2: the columns are listed as sections, see sections.write_sections
+# 3: the store is built from validated training records
+VERSION = 3
+
+# columns of the completion store in the order they are written
+COLUMNS = (
+    ('record_employee', 'i'),
+    ('record_offsets', 'q'),
+    ('program', 'i'),
+    ('timestamp', 'i'),
+    ('expires', 'i'),
+)
+
+
+def file_fingerprint(path):
+    '''
+    Returns:
+        dict: absolute path, size and modification time of the file
+    '''
+    stat = os.stat(path)
+    return {
+        'path': os.path.abspath(path),
+        'size': stat.st_size,
+        'mtime': stat.st_mtime_ns
+    }
+
+
+def file_hash(path):
+    '''
+    Returns:
+        str: SHA-256 hex digest of the file content
+    '''
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        while chunk := file.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_path(cache_directory, input_file):
+    '''
+    Returns:
+        str: path of the cache file for the training records file
+    '''
+    key = hashlib.sha256(os.path.abspath(input_file).encode()).hexdigest()
+    return os.path.join(cache_directory, f'{key[:32]}.cache')
+
+
+def write_store(store, path, source):
+    '''
+    Writes a completion store to a binary cache file, see
+    sections.write_sections. The JSON header holds the source fingerprint
+    and the string tables, and the sections are the raw columns. The file
+    is replaced atomically.
+
+    Parameters:
+        store (CompletionStore): completion store to write
+        path (str): path to the cache file
+        source (dict): fingerprint and hash of the training records file
+    '''
+    header = {
+        'source': source,
+        'employees': store.employees,
+        'programs': store.programs,
+        'date_labels': list(store.date_labels.items()),
+        'label_overrides': list(store.label_overrides.items()),
+        'record_counts': list(store.record_counts.items()),
+    }
+    write_sections(path, MAGIC, VERSION, header, (
+        (name, typecode, getattr(store, name)) for name, typecode in COLUMNS
+    ))
+
+
+def read_store(path):
+    '''
+    Maps a binary cache file written by write_store into memory. The columns
+    of the returned store are read-only views of the mapped file.
+
+    Parameters:
+        path (str): path to the cache file
+
+    Returns:
+        tuple: (CompletionStore, source fingerprint and hash)
+
+    Raises:
+        ValueError: if the file is not a compatible cache file
+    '''
+    header, columns = read_sections(path, MAGIC, VERSION, 'cache')
+
+    store = CompletionStore()
+    store.employees = header['employees']
+    store.employee_ids = {name: i for i, name in enumerate(store.employees)}
+    store.programs = header['programs']
+    store.program_ids = {name: i for i, name in enumerate(store.programs)}
+    store.date_labels = dict(header['date_labels'])
+    store.label_overrides = dict(header['label_overrides'])
+    store.record_counts = dict(header['record_counts'])
+    for name, column in columns.items():
+        setattr(store, name, column)
+
+    return store, header['source']
+
+
+def load_store(input_file, cache_directory):
+    '''
+    Returns the completion store of a training records file, read from the
+    cache if the file has not changed since the cache was written. Otherwise
+    the training records are parsed and the cache is rewritten.
+
+    A cache is valid if the path, size and modification time of the file
+    match. If only the modification time differs, e.g. after the file was
+    copied, the content hash decides, and the cache is rewritten with the
+    new fingerprint.
+
+    Parameters:
+        input_file (str): path to a training records file
+        cache_directory (str): directory of the cache files
+
+    Returns:
+        CompletionStore: completion store of the training records
+    '''
+    path = cache_path(cache_directory, input_file)
+    fingerprint = file_fingerprint(input_file)
+    content_hash = None
+
+    try:
+        store, source = read_store(path)
+        cached = {key: source[key] for key in fingerprint}
+        if cached == fingerprint:
+            return store
+        if source['path'] == fingerprint['path'] and \
+                source['size'] == fingerprint['size']:
+            content_hash = file_hash(input_file)
+            if source['hash'] == content_hash:
+                # record the new fingerprint, so later runs don't hash the
+                # file again
+                write_store(store, path, {**fingerprint, 'hash': content_hash})
+                return store
+    except (OSError, ValueError, KeyError):
+        pass
+
+    source = {**fingerprint, 'hash': content_hash or file_hash(input_file)}
+    store = CompletionStore(iter_training_records(input_file))
+    os.makedirs(cache_directory, exist_ok=True)
+    write_store(store, path, source)
+    return store
@@ -0,0 +1,190 @@
+from array import array
+from datetime import date
+
+from dates import date_ordinal
+from expiration import expired_training
+import validation
+from validation import TrainingRecord, validate_training_records
+
+# day ordinals start at 1, so 0 marks a missing or unparsable date
+NULL_DATE = 0
+
+
+class CompletionStore:
+    '''
+    Compact columnar representation of training records.
+
+    Program and employee names are interned and referenced by integer ids,
+    and every completion is stored as one row of array backed columns:
+    program id, timestamp day ordinal and expires day ordinal. Missing and
+    unparsable dates are stored as NULL_DATE. The completions of record i
+    are the rows record_offsets[i] to record_offsets[i+1]. The training
+    records are validated, see validation.validate_training_records.
+
+    The report functions in main.py accept a store in place of the training
+    records and produce the same reports.
+
+    Parameters:
+        training_records (list): list of training records in the
+        form of: {
+            'name': 'employee (string)',
+            'completions': [
+                {
+                    'name': 'training program name (string)',
+                    'timestamp': 'date string in the format m/d/yyyy',
+                    'expires': 'date string in the format m/d/yyyy'
+                }
+            ]
+        }
+        or TrainingRecords
+    '''
+
+    def __init__(self, training_records=()):
+        self.employees = []
+        self.employee_ids = {}
+        self.programs = []
+        self.program_ids = {}
+
+        # one entry per record
+        self.record_employee = array('i')
+        self.record_offsets = array('q', [0])
+
+        # one entry per completion
+        self.program = array('i')
+        self.timestamp = array('i')
+        self.expires = array('i')
+
+        # expiration dates are reported the way they were written, which is
+        # the same for all rows of a date unless the input mixes spellings
+        self.date_labels = {}
+        self.label_overrides = {}
+
+        # program id -> number of records with at least one completion
+        self.record_counts = {}
+
+        for record in validate_training_records(training_records):
+            self.add_record(record)
+
+    def _intern(self, names, ids, name):
+        if name not in ids:
+            ids[name] = len(names)
+            names.append(name)
+        return ids[name]
+
+    def add_record(self, record):
+        '''
+        Appends a single training record to the store.
+
+        Parameters:
+            record (TrainingRecord): training record checked by
+            validation.validate_record. A training record in the form of
+            CompletionStore is validated first.
+        '''
+        if not isinstance(record, TrainingRecord):
+            record, _ = validation.validate_record(record)
+            if record is None:
+                return
+
+        self.record_employee.append(
+            self._intern(self.employees, self.employee_ids, record.name))
+
+        completed = set()
+        for name, timestamp, expires, label in record.completions:
+            program = self._intern(self.programs, self.program_ids, name)
+            completed.add(program)
+
+            self.program.append(program)
+            self.timestamp.append(
+                timestamp.toordinal() if timestamp else NULL_DATE)
+
+            if expires:
+                if self.date_labels.setdefault(expires, label) != label:
+                    self.label_overrides[len(self.expires)] = label
+            self.expires.append(expires or NULL_DATE)
+
+        self.record_offsets.append(len(self.program))
+        for program in completed:
+            self.record_counts[program] = self.record_counts.get(program, 0) + 1
+
+    def __len__(self):
+        return len(self.record_employee)
+
+    def expires_label(self, row):
+        '''
+        Returns:
+            str: expiration date of the row as written in the training records
+        '''
+        return self.label_overrides.get(row) or \
+            self.date_labels[self.expires[row]]
+
+    def program_names(self):
+        '''
+        Returns:
+            list: list of unique training program names sorted alphabetically
+        '''
+        return sorted(self.programs)
+
+    def count(self, program):
+        '''
+        Returns:
+            int: number of records in which the program was completed
+        '''
+        program_id = self.program_ids.get(program)
+        return self.record_counts.get(program_id, 0)
+
+    def completion_report_by_year(self, fiscal_year, program_filter):
+        '''
+        See main.generate_completion_report_by_year.
+        '''
+        completed = {}
+        wanted = {
+            self.program_ids[program]
+            for program in program_filter if program in self.program_ids
+        }
+
+        if fiscal_year and wanted:
+            start = date(fiscal_year-1, 7, 1).toordinal()
+            end = date(fiscal_year, 6, 30).toordinal()
+            program, timestamp = self.program, self.timestamp
+            offsets = self.record_offsets
+            for record, employee in enumerate(self.record_employee):
+                for row in range(offsets[record], offsets[record+1]):
+                    if program[row] in wanted and \
+                            start <= timestamp[row] <= end:
+                        completed.setdefault(program[row], set()).add(
+                            self.employees[employee])
+
+        report = {}
+        for program in program_filter:
+            report[program] = sorted(
+                completed.get(self.program_ids.get(program), ()))
+        return report
+
+    def expiration_report(self, expiration, expires_in_days=30):
+        '''
+        See main.generate_expiration_report_by_date.
+        '''
+        cutoff = date_ordinal(expiration)
+        program, expires = self.program, self.expires
+        offsets = self.record_offsets
+
+        report = []
+        for record, employee in enumerate(self.record_employee):
+            programs = expired_training(
+                (
+                    (self.programs[program[row]], expires[row],
+                     self.expires_label(row))
+                    for row in range(offsets[record], offsets[record+1])
+                    if expires[row] != NULL_DATE and
+                    self.programs[program[row]]
+                ),
+                cutoff,
+                expires_in_days
+            )
+            if programs:
+                report.append({
+                    'name': self.employees[employee],
+                    'expired_training': programs
+                })
+
+        return sorted(report, key=lambda x: x['name'])
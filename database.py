@@ -0,0 +1,286 @@
+import argparse
+from datetime import date
+
+from dates import date_ordinal
+from ingest import iter_training_records
+from validation import validate_training_records
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS employees (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS programs (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE
+);
+CREATE TABLE IF NOT EXISTS completions (
+    id INTEGER PRIMARY KEY,
+    employee INTEGER NOT NULL REFERENCES employees (id),
+    program INTEGER NOT NULL REFERENCES programs (id),
+    timestamp INTEGER,
+    expires INTEGER,
+    expires_label TEXT
+);
+CREATE INDEX IF NOT EXISTS completions_program_timestamp
+    ON completions (program, timestamp);
+CREATE INDEX IF NOT EXISTS completions_employee_program_expires
+    ON completions (employee, program, expires);
+CREATE INDEX IF NOT EXISTS completions_expires
+    ON completions (expires);
+'''
+
+# employees with at least one completion of a program
+COUNT_QUERY = '''
+SELECT COUNT(DISTINCT employee) FROM completions WHERE program = ?
+'''
+
+# employees with a completion of a program within a range of days
+COMPLETED_QUERY = '''
+SELECT DISTINCT employees.name
+FROM completions JOIN employees ON employees.id = completions.employee
+WHERE completions.program = :program
+    AND completions.timestamp BETWEEN :start AND :end
+'''
+
+# The expired and expiring programs of every employee, in the order of
+# report 3: by employee name and record, then expired programs by their
+# oldest expiration, followed by programs expiring soon in completion order.
+# Programs without a name can't expire.
+EXPIRATION_QUERY = '''
+WITH expired AS (
+    SELECT employee, program, MAX(expires) AS latest, MIN(expires) AS oldest
+    FROM completions
+    WHERE expires IS NOT NULL
+    GROUP BY employee, program
+    HAVING MAX(expires) < :cutoff
+),
+expiring AS (
+    SELECT employee, program, MIN(id) AS first, MAX(id) AS last
+    FROM completions
+    WHERE expires BETWEEN :cutoff AND :cutoff + :expires_in_days
+    GROUP BY employee, program
+),
+entries AS (
+    SELECT
+        expired.employee,
+        expired.program,
+        0 AS status,
+        expired.oldest AS day,
+        (
+            SELECT MIN(id) FROM completions
+            WHERE employee = expired.employee
+                AND program = expired.program
+                AND expires = expired.oldest
+        ) AS position,
+        (
+            SELECT expires_label FROM completions
+            WHERE employee = expired.employee
+                AND program = expired.program
+                AND expires = expired.latest
+            ORDER BY id LIMIT 1
+        ) AS label
+    FROM expired
+    UNION ALL
+    SELECT
+        expiring.employee,
+        expiring.program,
+        1 AS status,
+        0 AS day,
+        expiring.first AS position,
+        (SELECT expires_label FROM completions WHERE id = expiring.last)
+    FROM expiring
+)
+SELECT employees.id, employees.name, programs.name, entries.status,
+    entries.label
+FROM entries
+JOIN employees ON employees.id = entries.employee
+JOIN programs ON programs.id = entries.program
+WHERE programs.name IS NOT NULL AND programs.name != ''
+ORDER BY employees.name, employees.id, entries.status, entries.day,
+    entries.position
+'''
+
+STATUS = ('expired', 'expires soon')
+
+
+class TrainingDatabase:
+    '''
+    SQLite database of training records with normalized employees, programs
+    and completions tables. Dates are stored as day ordinals, NULL if they
+    are missing or can't be parsed, and expiration dates are also stored the
+    way they were written, which is how they are reported.
+
+    Every training record is one row of the employees table, in the order of
+    the training records, so employees with the same name are counted and
+    reported like separate records, the same as in main.py.
+
+    The report functions in main.py accept a database in place of the
+    training records and produce the same reports with indexed queries.
+
+    Parameters:
+        path (str): path to the database file, defaults to an in-memory
+        database
+        create (bool): create the database file if it doesn't exist
+    '''
+
+    def __init__(self, path=':memory:', create=True):
+        # imported here, as main.py imports this module on every run
+        import pathlib
+        import sqlite3
+
+        if create:
+            self.connection = sqlite3.connect(path)
+        else:
+            self.connection = sqlite3.connect(
+                f'{pathlib.Path(path).absolute().as_uri()}?mode=rw', uri=True)
+        self.connection.executescript(SCHEMA)
+        # program name -> id, None for completions without a program name
+        self.program_ids = {
+            name: program_id
+            for program_id, name in self.connection.execute(
+                'SELECT id, name FROM programs')
+        }
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _program_id(self, name):
+        if name not in self.program_ids:
+            cursor = self.connection.execute(
+                'INSERT INTO programs (name) VALUES (?)', (name,))
+            self.program_ids[name] = cursor.lastrowid
+        return self.program_ids[name]
+
+    def add_records(self, training_records, batch_size=10000):
+        '''
+        Inserts training records in a single transaction. The training
+        records are validated, see validation.validate_training_records.
+
+        Parameters:
+            training_records (iterable): list of training records, see
+            main.generate_expiration_report_by_date, or TrainingRecords
+            batch_size (int): number of completions inserted at once
+
+        Returns:
+            TrainingDatabase: the database
+        '''
+        with self.connection:
+            employee = self.connection.execute(
+                'SELECT COALESCE(MAX(id), 0) FROM employees').fetchone()[0]
+            employees = []
+            completions = []
+            for record in validate_training_records(training_records):
+                employee += 1
+                employees.append((employee, record.name))
+                for program, timestamp, expires, label in record.completions:
+                    completions.append((
+                        employee,
+                        self._program_id(program),
+                        timestamp.toordinal() if timestamp else None,
+                        expires,
+                        label
+                    ))
+
+                if len(completions) >= batch_size:
+                    self._insert(employees, completions)
+                    employees, completions = [], []
+            self._insert(employees, completions)
+        return self
+
+    def _insert(self, employees, completions):
+        self.connection.executemany(
+            'INSERT INTO employees (id, name) VALUES (?, ?)', employees)
+        self.connection.executemany(
+            'INSERT INTO completions '
+            '(employee, program, timestamp, expires, expires_label) '
+            'VALUES (?, ?, ?, ?, ?)',
+            completions
+        )
+
+    def program_names(self):
+        '''
+        Returns:
+            list: list of unique training program names sorted alphabetically
+        '''
+        return sorted(program for program in self.program_ids if program)
+
+    def count(self, program):
+        '''
+        Returns:
+            int: number of records in which the program was completed
+        '''
+        if program not in self.program_ids:
+            return 0
+        return self.connection.execute(
+            COUNT_QUERY, (self.program_ids[program],)).fetchone()[0]
+
+    def completion_report_by_year(self, fiscal_year, program_filter):
+        '''
+        See main.generate_completion_report_by_year.
+        '''
+        report = {}
+        for program in program_filter:
+            if not fiscal_year or program not in self.program_ids:
+                report[program] = []
+                continue
+
+            report[program] = sorted(
+                name for name, in self.connection.execute(COMPLETED_QUERY, {
+                    'program': self.program_ids[program],
+                    'start': date(fiscal_year-1, 7, 1).toordinal(),
+                    'end': date(fiscal_year, 6, 30).toordinal()
+                })
+            )
+        return report
+
+    def expiration_report(self, expiration, expires_in_days=30):
+        '''
+        See main.generate_expiration_report_by_date.
+        '''
+        rows = self.connection.execute(EXPIRATION_QUERY, {
+            'cutoff': date_ordinal(expiration),
+            'expires_in_days': expires_in_days
+        })
+
+        report = []
+        record = None
+        for employee, name, program, status, label in rows:
+            if employee != record:
+                record = employee
+                report.append({'name': name, 'expired_training': []})
+            report[-1]['expired_training'].append({
+                'name': program,
+                'expiration': label,
+                'status': STATUS[status]
+            })
+        return report
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='''
+        Imports a training records file into a SQLite database, which
+        main.py can generate the reports from with --database.
+    ''')
+    parser.add_argument('-i', '--input_file', type=str, required=True,
+                        help='Path to the training records JSON file.')
+    parser.add_argument('-o', '--output_file', type=str, required=True,
+                        help='''Path to the database file. Training records
+                        are added to an existing database.''')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    with TrainingDatabase(args.output_file) as database:
+        database.add_records(iter_training_records(args.input_file))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+from datetime import datetime
+from functools import lru_cache
+
+# The number of distinct dates in the training records is tiny compared with
+# the number of completions, so a few thousand entries cover several decades.
+CACHE_SIZE = 4096
+
+
+def parse_date(date_string):
+    '''
+    Converts a date string in the format m/d/yyyy to a datetime object.
+    Results are memoized in a bounded cache, see cache_info.
+
+    Parameters:
+        date_string (str): date string, e.g. '2/29/2024'
+
+    Returns:
+        datetime: datetime object
+        None: if the date could not be parsed
+    '''
+    if not isinstance(date_string, str):
+        return None
+    return _parse_date(date_string)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _parse_date(date_string):
+    # equivalent to datetime.strptime(date_string, '%m/%d/%Y'), without
+    # the overhead of interpreting the format on every call
+    parts = date_string.split('/')
+    if len(parts) != 3:
+        return None
+
+    month, day, year = parts
+    if not (0 < len(month) <= 2 and 0 < len(day) <= 2 and len(year) == 4):
+        return None
+
+    digits = month + day + year
+    if not digits.isascii() or not digits.isdigit():
+        return None
+
+    try:
+        return datetime(int(year), int(month), int(day))
+    except ValueError:
+        return None
+
+
+def date_ordinal(date_string):
+    '''
+    Converts a date string in the format m/d/yyyy to a proleptic Gregorian
+    ordinal, see datetime.toordinal.
+
+    Parameters:
+        date_string (str): date string, e.g. '2/29/2024'
+
+    Returns:
+        int: day ordinal, 1 is January 1 of year 1
+        None: if the date could not be parsed
+    '''
+    date = parse_date(date_string)
+    return date.toordinal() if date else None
+
+
+def fiscal_year(date):
+    '''
+    Returns the fiscal year of a date. A fiscal year starts on July 1 of the
+    previous year and ends on June 30, e.g. fiscal year 2024 is
+    7/1/2023 - 6/30/2024.
+
+    Parameters:
+        date (date): date or datetime object
+
+    Returns:
+        int: year in the format yyyy
+    '''
+    return date.year + 1 if date.month >= 7 else date.year
+
+
+def cache_info():
+    '''
+    Returns:
+        CacheInfo: hits, misses, maxsize and currsize of the date cache
+    '''
+    return _parse_date.cache_info()
+
+
+def cache_clear():
+    '''
+    Empties the date cache and resets its statistics.
+    '''
+    _parse_date.cache_clear()
@@ -0,0 +1,258 @@
+import argparse
+import hashlib
+import marshal
+from datetime import datetime
+
+from dates import date_ordinal
+from ingest import iter_training_records
+from state import ReportState
+from validation import validate_training_records
+from writer import FORMATS, write_report
+
+
+class Snapshot:
+    '''
+    Training records of one point in time, grouped by employee, with a
+    fingerprint of each employee's records. Two snapshots are compared
+    employee by employee, and employees whose fingerprints match are
+    skipped without looking at their records.
+
+    Parameters:
+        summaries (dict): employee name -> function returning the list of
+        record summaries of the employee, see state.ReportState.summarize
+        fingerprints (dict): employee name -> fingerprint (bytes)
+    '''
+
+    def __init__(self, summaries, fingerprints):
+        self.summaries = summaries
+        self.fingerprints = fingerprints
+
+    @classmethod
+    def from_training_records(cls, training_records):
+        '''
+        Fingerprints the raw training records while they are read. Records
+        are only validated and summarized for employees that have changed.
+
+        Parameters:
+            training_records (iterable): training records, see
+            main.ReportEngine.add_record
+        '''
+        records = {}
+        digests = {}
+        for record in training_records:
+            name = record.get('name') if isinstance(record, dict) else None
+            records.setdefault(name, []).append(record)
+            digests.setdefault(name, _digest()).update(marshal.dumps(record))
+
+        def summaries(name):
+            return lambda: [
+                ReportState.summarize(record)
+                for record in validate_training_records(records[name])
+            ]
+
+        return cls(
+            {name: summaries(name) for name in records if name is not None},
+            {name: digest.digest() for name, digest in digests.items()}
+        )
+
+    @classmethod
+    def from_state(cls, state):
+        '''
+        Fingerprints the record summaries of a report state, see
+        state.ReportState.
+
+        Parameters:
+            state (ReportState): report state
+        '''
+        summaries = {}
+        fingerprints = {}
+        for name, employee in state.employees.items():
+            summaries[name] = lambda employee=employee: employee
+            digest = _digest()
+            for summary in employee:
+                digest.update(marshal.dumps((
+                    sorted(summary['programs']),
+                    sorted(summary['fiscal_years']),
+                    sorted(summary['timeline'].programs.items())
+                )))
+            fingerprints[name] = digest.digest()
+        return cls(summaries, fingerprints)
+
+
+def _digest():
+    return hashlib.blake2b(digest_size=16)
+
+
+def diff_snapshots(old, new, fiscal_year, expiration, expires_in_days=30):
+    '''
+    Compares two snapshots of the training records.
+
+    Parameters:
+        old (Snapshot): earlier training records
+        new (Snapshot): later training records
+        fiscal_year (int): year of report 2 in the format yyyy
+        expiration (str): date string of report 3 in the format m/d/yyyy
+        expires_in_days (int): time period in which experiation occurs
+
+    Returns:
+        dict: {
+            'employees': {
+                'added': [employee names],
+                'removed': [employee names],
+                'changed': [employee names]
+            },
+            'completion_totals': {
+                'training program name': change of the number of employees
+                who have completed it (int)
+            },
+            'completion_by_year': {
+                'training program name': {
+                    'added': [employees who completed it in the fiscal year],
+                    'removed': [employees who no longer have]
+                }
+            },
+            'expiration_by_date': [
+                {
+                    'name': 'employee (string)',
+                    'program': 'training program name (string)',
+                    'old_status': 'expired' | 'expires soon' | None,
+                    'new_status': 'expired' | 'expires soon' | None
+                }
+            ]
+        }
+        Lists are sorted by employee name, and programs alphabetically.
+    '''
+    cutoff = date_ordinal(expiration)
+    names = old.summaries.keys() | new.summaries.keys()
+
+    employees = {'added': [], 'removed': [], 'changed': []}
+    totals = {}
+    completed = {}
+    transitions = []
+
+    for name in sorted(names):
+        if old.fingerprints.get(name) == new.fingerprints.get(name):
+            continue
+        if name not in old.summaries:
+            employees['added'].append(name)
+        elif name not in new.summaries:
+            employees['removed'].append(name)
+
+        before = _view(old, name, fiscal_year, cutoff, expires_in_days)
+        after = _view(new, name, fiscal_year, cutoff, expires_in_days)
+        if before == after:
+            continue
+        if name in old.summaries and name in new.summaries:
+            employees['changed'].append(name)
+
+        for program in before['totals'].keys() | after['totals'].keys():
+            totals[program] = totals.get(program, 0) + \
+                after['totals'].get(program, 0) - \
+                before['totals'].get(program, 0)
+        for key, programs in (
+            ('added', after['completed'] - before['completed']),
+            ('removed', before['completed'] - after['completed'])
+        ):
+            for program in programs:
+                completed.setdefault(
+                    program, {'added': [], 'removed': []})[key].append(name)
+        for program in sorted(before['status'].keys() |
+                              after['status'].keys()):
+            if before['status'].get(program) != after['status'].get(program):
+                transitions.append({
+                    'name': name,
+                    'program': program,
+                    'old_status': before['status'].get(program),
+                    'new_status': after['status'].get(program)
+                })
+
+    return {
+        'employees': employees,
+        'completion_totals': {
+            program: totals[program]
+            for program in sorted(totals) if totals[program]
+        },
+        'completion_by_year': {
+            program: completed[program] for program in sorted(completed)
+        },
+        'expiration_by_date': transitions
+    }
+
+
+def _view(snapshot, name, fiscal_year, cutoff, expires_in_days):
+    # what the reports show of an employee
+    view = {'totals': {}, 'completed': set(), 'status': {}}
+    if name not in snapshot.summaries:
+        return view
+
+    for summary in snapshot.summaries[name]():
+        for program in summary['programs']:
+            view['totals'][program] = view['totals'].get(program, 0) + 1
+        view['completed'].update(
+            program for year, program in summary['fiscal_years']
+            if year == fiscal_year
+        )
+        for program in summary['timeline'].expired_training(
+                cutoff, expires_in_days):
+            view['status'].setdefault(program['name'], program['status'])
+    return view
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='''
+        Compares two training records files, or two report state files of
+        main.py, and writes what changed in the reports: employees who
+        newly completed a program in the fiscal year or no longer have,
+        changes of the program totals, and programs whose expiration status
+        changed. Employees whose training records are unchanged are skipped.
+    ''')
+    parser.add_argument('old', type=str,
+                        help='Path to the earlier training records file.')
+    parser.add_argument('new', type=str,
+                        help='Path to the later training records file.')
+    parser.add_argument('-s', '--state', action='store_true',
+                        help='''The files are report state files written by
+                        main.py --state.''')
+    parser.add_argument('-y', '--fiscal_year', type=int, required=False,
+                        help='''The fiscal year of the completion report.
+                        Defaults to the current year.''')
+    parser.add_argument('-x', '--expiration', type=str, required=False,
+                        help='''The expiration date of the expiration report
+                        in the format m/d/Y. Defaults to today.''')
+    parser.add_argument('-o', '--output_file', type=str,
+                        default='report_diff.json',
+                        help='Path to the diff file. Defaults to '
+                        'report_diff.json.')
+    parser.add_argument('-f', '--format', choices=FORMATS, default='pretty',
+                        help='''Format of the diff file, see main.py.
+                        Defaults to pretty.''')
+    args = parser.parse_args()
+    if args.expiration and not date_ordinal(args.expiration):
+        parser.error(f'invalid expiration date: {args.expiration}')
+    return args
+
+
+def main():
+    args = parse_arguments()
+    today = datetime.now()
+
+    if args.state:
+        old, new = (
+            Snapshot.from_state(ReportState.load(path))
+            for path in (args.old, args.new)
+        )
+    else:
+        old, new = (
+            Snapshot.from_training_records(iter_training_records(path))
+            for path in (args.old, args.new)
+        )
+
+    write_report(args.output_file, diff_snapshots(
+        old, new,
+        args.fiscal_year or today.year,
+        args.expiration or today.strftime('%m/%d/%Y')
+    ), args.format)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+from bisect import bisect_left
+
+
+def expired_training(completions, cutoff, expires_in_days=30):
+    '''
+    Given the expiring completions of one employee, return the programs
+    that have expired by the cutoff date, followed by the programs that
+    expire within the specified number of days after it. This is the
+    'expired_training' list of main.generate_expiration_report_by_date.
+
+    A program has expired if its most recent expiration is before the
+    cutoff, expired programs are listed by their oldest expiration.
+    A program expires soon if any of its completions expires within the
+    time period, programs expiring soon are listed in completion order.
+
+    Parameters:
+        completions (iterable): completions in the order of the training
+        record, in the form of: (
+            'training program name (string)',
+            expiration date as day ordinal (int),
+            'date string in the format m/d/yyyy'
+        )
+        cutoff (int): expiration date as day ordinal
+        expires_in_days (int): time period in which experiation occurs
+
+    Returns:
+        list: list of programs in the form: {
+            'name': 'training program name (string)',
+            'expiration': 'date string in the format m/d/yyyy',
+            'status': 'expired' | 'expires soon'
+        }
+    '''
+    # most recent expiration of each program as (day, string), and the
+    # oldest expiration as (day, position) which determines the order in
+    # which expired programs are listed
+    most_recent = {}
+    oldest = {}
+    expiring_soon = {}
+
+    for position, (program, expires, label) in enumerate(completions):
+        if program not in most_recent or expires > most_recent[program][0]:
+            most_recent[program] = (expires, label)
+        if program not in oldest or expires < oldest[program][0]:
+            oldest[program] = (expires, position)
+        if 0 <= expires - cutoff <= expires_in_days:
+            expiring_soon[program] = label
+
+    programs = []
+    for program in sorted(oldest, key=oldest.get):
+        expires, label = most_recent[program]
+        if expires < cutoff:
+            programs.append({
+                'name': program,
+                'expiration': label,
+                'status': 'expired'
+            })
+    for program, label in expiring_soon.items():
+        programs.append({
+            'name': program,
+            'expiration': label,
+            'status': 'expires soon'
+        })
+
+    return programs
+
+
+def tiered_expired_training(completions, cutoff, horizons):
+    '''
+    Same as expired_training, with several time periods: a program expiring
+    soon is classified into the shortest period, or tier, that one of its
+    completions expires within, and is reported with the last completion
+    expiring within that period. With a single period the programs are the
+    same as the ones of expired_training.
+
+    Tiers are found by binary search of the sorted periods in a single pass
+    over the completions, so any number of periods costs about the same as
+    one.
+
+    Parameters:
+        completions (iterable): completions, see expired_training
+        cutoff (int): expiration date as day ordinal
+        horizons (tuple): time periods in days, sorted and unique
+
+    Returns:
+        list: list of programs, see expired_training. Programs expiring soon
+        are listed by tier, then in completion order, and have an
+        additional 'expires_in_days' field with the period of their tier.
+    '''
+    longest = horizons[-1]
+    most_recent = {}
+    oldest = {}
+    # program name -> [tier, position of its first completion, string of
+    # its last completion]
+    tiers = {}
+
+    for position, (program, expires, label) in enumerate(completions):
+        if program not in most_recent or expires > most_recent[program][0]:
+            most_recent[program] = (expires, label)
+        if program not in oldest or expires < oldest[program][0]:
+            oldest[program] = (expires, position)
+
+        days = expires - cutoff
+        if 0 <= days <= longest:
+            tier = bisect_left(horizons, days)
+            current = tiers.get(program)
+            if current is None or tier < current[0]:
+                tiers[program] = [tier, position, label]
+            elif tier == current[0]:
+                current[2] = label
+
+    programs = []
+    for program in sorted(oldest, key=oldest.get):
+        expires, label = most_recent[program]
+        if expires < cutoff:
+            programs.append({
+                'name': program,
+                'expiration': label,
+                'status': 'expired'
+            })
+    for tier, _, program, label in sorted(
+            (tier, position, program, label)
+            for program, (tier, position, label) in tiers.items()):
+        programs.append({
+            'name': program,
+            'expiration': label,
+            'status': 'expires soon',
+            'expires_in_days': horizons[tier]
+        })
+
+    return programs
+
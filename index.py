@@ -0,0 +1,184 @@
+from dates import fiscal_year
+from validation import validate_training_records
+
+
+class ProgramIndex:
+    '''
+    Inverted index of training records, which maps each training program
+    name to the employees who have completed it and their completions.
+
+    The index is built once from the training records and then answers
+    "who completed program X" without scanning all records again. New records
+    can be inserted at any time with add_record. The training records are
+    validated with their completion dates, see validation.validate_record.
+
+    Parameters:
+        training_records (list): list of training records in the
+        form of: {
+            'name': 'employee (string)',
+            'completions': [
+                {
+                    'name': 'training program name (string)',
+                    'timestamp': 'date string in the format m/d/yyyy',
+                    'expires': 'date string in the format m/d/yyyy'
+                }
+            ]
+        }
+        or TrainingRecords
+    '''
+
+    def __init__(self, training_records=()):
+        # program name -> {employee name -> [Completion, ...]}
+        self.programs = {}
+        # program name -> number of records with at least one completion
+        self.record_counts = {}
+        self.add_records(training_records)
+
+    def add_record(self, record):
+        '''
+        Inserts a single training record into the index.
+
+        Parameters:
+            record (dict): training record, see ProgramIndex
+        '''
+        self.add_records((record,))
+
+    def add_records(self, training_records):
+        for record in validate_training_records(
+                training_records, reports=('by_year',)):
+            completed = set()
+            for completion in record.completions:
+                self.programs.setdefault(completion.program, {}).setdefault(
+                    record.name, []).append(completion)
+                completed.add(completion.program)
+
+            for program in completed:
+                self.record_counts[program] = \
+                    self.record_counts.get(program, 0) + 1
+        return self
+
+    def program_names(self):
+        '''
+        Returns:
+            list: list of unique training program names sorted alphabetically
+        '''
+        return sorted(self.programs)
+
+    def count(self, program):
+        '''
+        Returns:
+            int: number of records in which the program was completed
+        '''
+        return self.record_counts.get(program, 0)
+
+    def employees(self, program):
+        '''
+        Returns:
+            dict: index of employee names and their completions of the
+            program, see validation.Completion
+        '''
+        return self.programs.get(program, {})
+
+
+class FiscalYearIndex:
+    '''
+    Index of training records, which maps each fiscal year and training
+    program name to the employees who have completed the program in that
+    fiscal year.
+
+    Every completion is assigned to its fiscal year once when it is inserted,
+    so the completion report of any fiscal year and program filter is looked
+    up without parsing timestamps again. New records can be inserted at any
+    time with add_record.
+
+    Parameters:
+        training_records (list): list of training records, see ProgramIndex
+    '''
+
+    def __init__(self, training_records=()):
+        # (fiscal year, program name) -> set of employee names
+        self.completed = {}
+        # (fiscal year, program name) -> sorted list of employee names,
+        # sorted when first looked up after a change
+        self._sorted = {}
+        self.add_records(training_records)
+
+    def add_record(self, record):
+        '''
+        Inserts a single training record into the index.
+
+        Parameters:
+            record (dict): training record, see ProgramIndex
+        '''
+        self.add_records((record,))
+
+    def add_records(self, training_records):
+        for record in validate_training_records(
+                training_records, reports=('by_year',)):
+            for program, timestamp, _, _ in record.completions:
+                if not timestamp:
+                    continue
+
+                key = (fiscal_year(timestamp), program)
+                employees = self.completed.setdefault(key, set())
+                if record.name not in employees:
+                    employees.add(record.name)
+                    self._sorted.pop(key, None)
+        return self
+
+    def fiscal_years(self):
+        '''
+        Returns:
+            list: list of fiscal years with completions in ascending order
+        '''
+        return sorted({year for year, _ in self.completed})
+
+    def employees(self, fiscal_year, program):
+        '''
+        Returns:
+            list: sorted list of employees who have completed the program in
+            the fiscal year
+        '''
+        key = (fiscal_year, program)
+        if key not in self._sorted:
+            self._sorted[key] = sorted(self.completed.get(key, ()))
+        return self._sorted[key]
+
+    def employees_between(self, first_year, last_year, program):
+        '''
+        Returns:
+            list: sorted list of employees who have completed the program in
+            any fiscal year from first_year to last_year, inclusive
+        '''
+        years = range(first_year, last_year + 1)
+        if len(years) == 1:
+            return list(self.employees(first_year, program))
+
+        employees = set()
+        for year in years:
+            employees.update(self.completed.get((year, program), ()))
+        return sorted(employees)
+
+    def completion_report_by_year(
+            self, fiscal_year, program_filter, last_fiscal_year=None):
+        '''
+        See main.generate_completion_report_by_year.
+
+        Parameters:
+            fiscal_year (int): year in the format yyyy
+            program_filter (list): list of training program names
+            last_fiscal_year (int): if given, the report lists the employees
+            who have completed a program in any fiscal year from fiscal_year
+            to last_fiscal_year
+
+        Returns:
+            dict: index of training program names and the sorted list of
+            employees who have completed it
+        '''
+        if not fiscal_year:
+            return {program: [] for program in program_filter}
+        return {
+            program: self.employees_between(
+                fiscal_year, last_fiscal_year or fiscal_year, program)
+            for program in program_filter
+        }
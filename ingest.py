@@ -0,0 +1,222 @@
+import glob
+import json
+import re
+
+CHUNK_SIZE = 1 << 16
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+decoder = json.JSONDecoder()
+
+
+def iter_training_records(path, chunk_size=CHUNK_SIZE):
+    '''
+    Reads a training records file one record at a time, so memory usage
+    depends on the size of a single record rather than the whole file.
+
+    Parameters:
+        path (str): path to a JSON file containing an array of training
+        records, or a JSON Lines file with one training record per line
+        chunk_size (int): number of characters read from the file at once
+
+    Returns:
+        iterator: training records in the order they appear in the file
+    '''
+    with open(path, 'r') as file:
+        yield from read_training_records(file, chunk_size)
+
+
+def read_training_records(file, chunk_size=CHUNK_SIZE):
+    '''
+    Incrementally decodes training records from an open text file, see
+    iter_training_records.
+
+    Raises:
+        json.JSONDecodeError: if the file is not valid JSON or JSON Lines
+    '''
+    buffer = ''
+    position = 0
+    eof = False
+
+    def read_more(size=chunk_size):
+        nonlocal buffer, position, eof
+        chunk = file.read(size)
+        eof = not chunk
+        # drop everything that has already been decoded
+        buffer = buffer[position:] + chunk
+        position = 0
+        return not eof
+
+    def next_character():
+        # skips whitespace and returns the next character, '' at end of file
+        nonlocal position
+        while True:
+            position = WHITESPACE.match(buffer, position).end()
+            if position < len(buffer):
+                return buffer[position]
+            if not read_more():
+                return ''
+
+    def decode():
+        nonlocal position
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+                # a value ending at the end of the buffer might continue
+                # in the next chunk, e.g. a number
+                if end < len(buffer) or eof:
+                    position = end
+                    return value
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            # grow the buffer geometrically so that records larger than
+            # a chunk are not decoded over and over again
+            read_more(max(chunk_size, len(buffer)))
+
+    def fail(message):
+        raise json.JSONDecodeError(message, buffer, position)
+
+    if next_character() != '[':
+        # JSON Lines: one record per line
+        while next_character():
+            yield decode()
+        return
+
+    position += 1
+    if next_character() == ']':
+        position += 1
+    else:
+        while True:
+            next_character()
+            yield decode()
+
+            separator = next_character()
+            position += 1
+            if separator == ']':
+                break
+            if separator != ',':
+                position -= 1
+                fail("Expecting ',' delimiter")
+
+    if next_character():
+        fail('Extra data')
+
+
+def expand_paths(patterns):
+    '''
+    Expands glob patterns, e.g. 'exports/*.json', into the matching paths.
+    Paths without wildcards are kept as they are.
+
+    Parameters:
+        patterns (list): list of paths and glob patterns
+
+    Returns:
+        list: list of unique paths, in the order of the patterns and sorted
+        alphabetically within a pattern
+
+    Raises:
+        FileNotFoundError: if a pattern matches no files
+    '''
+    paths = []
+    for pattern in patterns:
+        if not glob.has_magic(pattern):
+            paths.append(pattern)
+            continue
+        matches = sorted(glob.glob(pattern))
+        if not matches:
+            raise FileNotFoundError(f'No files match {pattern}')
+        paths.extend(matches)
+    return list(dict.fromkeys(paths))
+
+
+def read_training_file(path):
+    '''
+    Returns:
+        list: all training records of a file, see iter_training_records
+    '''
+    return list(iter_training_records(path))
+
+
+async def gather_training_files(paths, executor):
+    '''
+    Reads and decodes the files concurrently in the executor.
+
+    Returns:
+        list: list of the training records of each file
+    '''
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    return await asyncio.gather(*(
+        loop.run_in_executor(executor, read_training_file, path)
+        for path in paths
+    ))
+
+
+def read_training_files(paths, workers=1):
+    '''
+    Reads several training records files concurrently and merges them, see
+    merge_training_records. With more than one worker the files are decoded
+    in worker processes, so the wall time approaches that of the largest
+    file. Otherwise they are read in threads, which only overlaps reading
+    with decoding.
+
+    Parameters:
+        paths (list): list of paths to training records files
+        workers (int): number of worker processes
+
+    Returns:
+        list: merged training records
+    '''
+    # only needed for several files, and slow to import
+    import asyncio
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    if workers > 1:
+        executor = ProcessPoolExecutor(min(workers, len(paths)))
+    else:
+        executor = ThreadPoolExecutor(min(len(paths), 8))
+    with executor:
+        files = asyncio.run(gather_training_files(paths, executor))
+    return merge_training_records(files)
+
+
+def merge_training_records(files):
+    '''
+    Merges the training records of several files into one training record
+    per employee. The completions of an employee are the union of the
+    completions of all their records, in the order they first appear.
+    Malformed records, e.g. without an employee name, are not merged and
+    are left in place for validation.validate_training_records.
+
+    Parameters:
+        files (iterable): lists of training records
+
+    Returns:
+        list: training records in the order the employees first appear
+    '''
+    records = []
+    merged = {}
+    seen = {}
+    for training_records in files:
+        for record in training_records:
+            if not isinstance(record, dict) or \
+                    not isinstance(record.get('name'), str) or \
+                    not isinstance(record.get('completions', []), list):
+                records.append(record)
+                continue
+
+            name = record['name']
+            if name not in merged:
+                merged[name] = {**record, 'completions': []}
+                records.append(merged[name])
+                seen[name] = set()
+
+            for completion in record.get('completions', []):
+                key = json.dumps(completion, sort_keys=True)
+                if key not in seen[name]:
+                    seen[name].add(key)
+                    merged[name]['completions'].append(completion)
+
+    return records
@@ -0,0 +1,180 @@
+import argparse
+import sys
+from collections import defaultdict
+from datetime import datetime
+from functools import lru_cache
+
+from dates import date_ordinal
+from ingest import iter_training_records
+from state import ReportState
+from validation import validate_training_records
+from writer import iter_pretty
+
+# number of employee summaries kept
+CACHE_SIZE = 1024
+
+
+class EmployeeIndex:
+    '''
+    Index of training records by employee name, built once, from which the
+    training status of a single employee is looked up without generating
+    the reports. Summaries are computed on the first lookup and the most
+    recently used ones are cached until the employee's records change.
+
+    Parameters:
+        training_records (iterable): training records, see
+        main.ReportEngine.add_record
+        expires_in_days (int): time period in which experiation occurs
+        cache_size (int): maximum number of cached summaries
+    '''
+
+    def __init__(self, training_records=(), expires_in_days=30,
+                 cache_size=CACHE_SIZE):
+        self.expires_in_days = expires_in_days
+        # employee name -> list of validated training records
+        self.records = {}
+        # employee name -> number of updates, part of the cache key, so
+        # the summaries of an updated employee are never looked up again
+        self.versions = {}
+        self.cached_summary = lru_cache(maxsize=cache_size)(self._summary)
+
+        for record in validate_training_records(training_records):
+            self.records.setdefault(record.name, []).append(record)
+
+    def update(self, training_records):
+        '''
+        Replaces the training records of every employee that appears in the
+        given training records, and adds new employees, see
+        state.ReportState.update.
+
+        Returns:
+            set: names of the updated employees
+        '''
+        changed = defaultdict(list)
+        for record in validate_training_records(training_records):
+            changed[record.name].append(record)
+
+        for name, records in changed.items():
+            self.records[name] = records
+            self.versions[name] = self.versions.get(name, 0) + 1
+        return set(changed)
+
+    def __contains__(self, name):
+        return name in self.records
+
+    def summary(self, name, expiration=None):
+        '''
+        Looks up the training status of an employee. The summary is cached
+        and must not be modified.
+
+        Parameters:
+            name (str): employee name
+            expiration (str): date string in the format m/d/yyyy, defaults
+            to today
+
+        Returns:
+            dict: {
+                'name': 'employee (string)',
+                'programs': sorted list of completed training programs,
+                'fiscal_years': {
+                    fiscal year (int): sorted list of training programs
+                    completed in the fiscal year
+                },
+                'expired_training': list of expired and expiring programs,
+                see main.generate_expiration_report_by_date
+            }
+
+        Raises:
+            KeyError: if there are no training records of the employee
+            ValueError: if the expiration date is invalid
+        '''
+        if name not in self.records:
+            raise KeyError(name)
+        expiration = expiration or datetime.now().strftime('%m/%d/%Y')
+        if not date_ordinal(expiration):
+            raise ValueError(f'invalid expiration date: {expiration}')
+        return self.cached_summary(
+            name, self.versions.get(name, 0), expiration)
+
+    def _summary(self, name, version, expiration):
+        cutoff = date_ordinal(expiration)
+        programs = set()
+        fiscal_years = {}
+        expired = []
+        for record in self.records[name]:
+            summary = ReportState.summarize(record)
+            programs.update(summary['programs'])
+            for year, program in summary['fiscal_years']:
+                fiscal_years.setdefault(year, set()).add(program)
+            expired.extend(summary['timeline'].expired_training(
+                cutoff, self.expires_in_days))
+
+        return {
+            'name': name,
+            'programs': sorted(programs),
+            'fiscal_years': {
+                year: sorted(fiscal_years[year])
+                for year in sorted(fiscal_years)
+            },
+            'expired_training': expired
+        }
+
+    def program_status(self, name, program, expiration=None):
+        '''
+        Returns:
+            str: 'expired' or 'expires soon', see summary, 'current' if the
+            employee has completed the program otherwise, and
+            'not completed' if not
+        '''
+        summary = self.summary(name, expiration)
+        for expired in summary['expired_training']:
+            if expired['name'] == program:
+                return expired['status']
+        if program in summary['programs']:
+            return 'current'
+        return 'not completed'
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='''
+        Looks up the training status of employees: their completed
+        programs, the programs completed in each fiscal year, and their
+        expired and expiring programs.
+    ''')
+    parser.add_argument('-i', '--input_file', type=str, required=True,
+                        help='Path to the training records JSON file.')
+    parser.add_argument('-x', '--expiration', type=str, required=False,
+                        help='''The expiration date in the format m/d/Y.
+                        Defaults to today.''')
+    parser.add_argument('-p', '--program', type=str, required=False,
+                        help='''A training program name. Adds the status of
+                        the program to each employee: current, expires soon,
+                        expired or not completed.''')
+    parser.add_argument('names', nargs='+', help='Employee names.')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    index = EmployeeIndex(iter_training_records(args.input_file))
+
+    results = []
+    for name in args.names:
+        try:
+            result = dict(index.summary(name, args.expiration))
+            if args.program:
+                result['status'] = index.program_status(
+                    name, args.program, args.expiration)
+        except KeyError:
+            print(f'No training records of {name}', file=sys.stderr)
+            exit(1)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            exit(1)
+        results.append(result)
+
+    print(''.join(iter_pretty(results)))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,28 @@
 import argparse
-import json
+import io
+import sys
+from collections import deque
+from contextlib import nullcontext
 from datetime import datetime
+from itertools import islice
+
+from columnar import CompletionStore
+from database import TrainingDatabase
+from dates import date_ordinal, parse_date
+from expiration import expired_training, tiered_expired_training
+from index import FiscalYearIndex, ProgramIndex
+import ingest
+from ingest import iter_training_records
+from mapped import MappedIndex
+from timeline import ExpirationTimeline
+import validation
+from validation import (
+    REPORTS, Completion, TrainingRecord, validate_training_records)
+from writer import FORMATS, write_report
+
+# Modules that only some runs need, e.g. NumPy, multiprocessing and the
+# cache, are imported where they are used, so that the frequent small runs
+# of the command line tool start quickly.
 
 
 def aggregate_training_programs(training_records):
@@ -16,18 +38,21 @@ def aggregate_training_programs(training_records):
                 {'name': 'training program name (string)'}
             ]
         }
+        or TrainingRecords, see validation.validate_record
 
     Returns:
         list: list of unique training program names sorted alphabetically
     '''
+    if isinstance(training_records, (
+            ProgramIndex, CompletionStore, TrainingDatabase, MappedIndex)):
+        return training_records.program_names()
+
     names = set()
-    for record in training_records:
-        for completion in record.get('completions', []):
-            name = completion.get('name')
-            if name:
-                names.add(completion['name'])
+    for record in validate_training_records(
+            training_records, reports=('totals',)):
+        names.update(completion.program for completion in record.completions)
 
-    return sorted(list(names))
+    return sorted(names)
 
 
 def has_completed_training_program(program_name, completion_records):
@@ -37,13 +62,17 @@ def has_completed_training_program(program_name, completion_records):
     Parameters:
         completion_records (list): list of completions in the
         form of: {'name': 'training program name (string)', ...}
+        or the Completions of a TrainingRecord
 
     Returns:
         True: program was found
         False: program was not found
     '''
     for completion in completion_records:
-        if completion.get('name') == program_name:
+        if isinstance(completion, Completion):
+            if completion.program == program_name:
+                return True
+        elif completion.get('name') == program_name:
             return True
     return False
 
@@ -55,27 +84,38 @@ def count_program_completions(training_programs, training_records):
 
     Parameters:
         training_programs (list): list of training program names
-        training_records (list): list of training records in the
-        form of: {
+        training_records (list | ProgramIndex): list of training records in
+        the form of: {
             'name': 'employee (string)', 
             'completions': [
                 {'name': 'training program name (string)'}
             ]
         }
+        or TrainingRecords, or a program index, completion store, database
+        or mapped index built from them
 
     Returns:
         dict: index of training program names and the number of employees 
         who have completed it 
     '''
+    index = training_records
+    if isinstance(index, (
+            ProgramIndex, CompletionStore, TrainingDatabase, MappedIndex)):
+        return {
+            program: index.count(program) for program in training_programs
+        }
+
+    # report 1 doesn't need any dates
+    counts = {}
+    for record in validate_training_records(
+            training_records, reports=('totals',)):
+        for program in {completion.program
+                        for completion in record.completions}:
+            counts[program] = counts.get(program, 0) + 1
+
     totals = {}
     for program in training_programs:
-        totals[program] = 0
-        for record in training_records:
-            if has_completed_training_program(
-                program,
-                record.get('completions', [])
-            ):
-                totals[program] += 1
+        totals[program] = counts.get(program, 0)
     return totals
 
 
@@ -83,7 +123,7 @@ def date_from_string(date_string):
     '''
     Converts a date string in the format m/d/yyyy to a datetime object.
     The date format is specific to the deparment records and can not be 
-    configured.
+    configured. Parsed dates are cached, see dates.cache_info.
 
     Parameters:
         date_string (str): date string, e.g. '2/29/2024'
@@ -92,11 +132,7 @@ def date_from_string(date_string):
         datetime: datetime object
         None: if the date could not be parsed
     '''
-
-    try:
-        return datetime.strptime(date_string, '%m/%d/%Y')
-    except:
-        return None
+    return parse_date(date_string)
 
 
 def is_within_fiscal_year(fiscal_year, timestamp):
@@ -129,8 +165,8 @@ def generate_completion_report_by_year(
     the specified fiscal year.
 
     Parameters:
-        training_records (list): list of training records in the
-        form of: {
+        training_records (list | ProgramIndex | FiscalYearIndex): list of
+        training records in the form of: {
             'name': 'employee (string)', 
             'completions': [
                 {
@@ -139,6 +175,8 @@ def generate_completion_report_by_year(
                 }
             ]
         }
+        or TrainingRecords, or a program index, fiscal year index,
+        completion store or database built from them
         fiscal_year (int): year in the format yyyy
         program_filter (list): list of training program names
 
@@ -146,28 +184,48 @@ def generate_completion_report_by_year(
         dict: index of training program names and the list of employees 
         who have completed it
     '''
+    if isinstance(
+            training_records, (CompletionStore, TrainingDatabase, MappedIndex)):
+        return training_records.completion_report_by_year(
+            fiscal_year, program_filter)
+
+    if not isinstance(training_records, ProgramIndex):
+        # every completion is assigned to its fiscal year once
+        index = training_records
+        if not isinstance(index, FiscalYearIndex):
+            index = FiscalYearIndex(training_records)
+        return index.completion_report_by_year(fiscal_year, program_filter)
+
+    index = training_records
+    if not fiscal_year:
+        return {program: [] for program in program_filter}
+    fiscal_year_start = datetime(fiscal_year-1, 7, 1)
+    fiscal_year_end = datetime(fiscal_year, 6, 30)
+
     report = {}
     for program in program_filter:
         report[program] = []
-        for record in training_records:
-            for completion in record.get('completions', []):
-                if completion.get('name') == program:
-                    if is_within_fiscal_year(
-                        fiscal_year,
-                        completion['timestamp']
-                    ):
-                        report[program].append(record['name'])
-
-        # sort and deduplicate aggregated people
-        report[program] = sorted(list(set(report[program])))
+        for employee, completions in index.employees(program).items():
+            for completion in completions:
+                if completion.timestamp and (
+                    fiscal_year_start <= completion.timestamp <=
+                    fiscal_year_end
+                ):
+                    report[program].append(employee)
+                    break
+
+        # employees are unique within the index, only sort them
+        report[program] = sorted(report[program])
 
     return report
 
 
-def index_expired_programs(completions, expiration_date):
+def index_program_expirations(completions):
     '''
-    Given a list of completions and an expiration date, return a list of
-    programs that have expired.
+    Given a list of completions, return their expirations grouped by program
+    and sorted, which can be used to index the expired and expiring programs
+    for any number of expiration dates. Completions without a program name
+    or a valid expiration date are ignored.
 
     Parameters:
         completions (list): list of completions in the
@@ -175,47 +233,64 @@ def index_expired_programs(completions, expiration_date):
             'name': 'training program name (string)', 
             'expires': 'date string in the format m/d/yyyy'
         }
-        expiration_date (str): date string in the format m/d/yyyy
+        or the Completions of a TrainingRecord
 
     Returns:
-        dict: index of training program names and their expiration date
+        ExpirationTimeline: expirations of the programs
     '''
-    # create a program index with the most recent expiration date as the value
-    most_recent_expired = {}
-
-    # sort completions by expiration date from oldest to newest, so if
-    # the last completion is not expired, it will remove the program
-    # from the index. Also, ignore programs that can't expire.
-    sorted_completions = sorted(
-        filter(lambda x: x.get('expires'), completions),
-        key=lambda x: date_from_string(x['expires'])
-    )
+    expirations = []
+    for completion in completions:
+        if isinstance(completion, Completion):
+            if completion.expires:
+                expirations.append(
+                    (completion.program, completion.expires, completion.label))
+            continue
 
-    for completion in sorted_completions:
-        # validate the completion data
         program = completion.get('name')
         if not program:
             continue
 
-        expiration = date_from_string(completion.get('expires'))
-        if not expiration:
+        # most completions can't expire
+        label = completion.get('expires')
+        if label is None:
             continue
 
-        if expiration < expiration_date:
-            if program in most_recent_expired:
-                # a program can be completed multiple times
-                # make sure to use the most recent expiration date for the index
-                most_recent = date_from_string(most_recent_expired[program])
-                if expiration > most_recent:
-                    most_recent_expired[program] = completion['expires']
-            else:
-                most_recent_expired[program] = completion['expires']
-        elif program in most_recent_expired:
-            # if program was previously indexed as expired, but there is a newer
-            # completion that is mot expired, remove the program from index
-            del most_recent_expired[program]
+        expires = date_ordinal(label)
+        if expires:
+            expirations.append((program, expires, label))
+
+    return ExpirationTimeline(expirations)
+
+
+def index_expired_programs(completions, expiration_date):
+    '''
+    Given a list of completions and an expiration date, return a list of
+    programs that have expired.
+
+    Parameters:
+        completions (list | ExpirationTimeline): list of completions in the
+        form of: {
+            'name': 'training program name (string)', 
+            'expires': 'date string in the format m/d/yyyy'
+        }
+        or their expirations, see index_program_expirations
+        expiration_date (datetime): expiration date
+
+    Returns:
+        dict: index of training program names and their expiration date
+    '''
+    if not isinstance(completions, ExpirationTimeline):
+        completions = index_program_expirations(completions)
 
-    return most_recent_expired
+    # a program has expired if its most recent expiration is before the
+    # expiration date, expired programs are listed by their oldest expiration
+    cutoff = expiration_date.toordinal()
+    expired = {}
+    for program in completions.order:
+        expires, _, label = completions.most_recent[program]
+        if expires < cutoff:
+            expired[program] = label
+    return expired
 
 
 def index_expiring_programs(completions, expiration_date, expires_in_days):
@@ -227,34 +302,27 @@ def index_expiring_programs(completions, expiration_date, expires_in_days):
     as looking for possible future expirations in the past is not useful.
 
     Parameters:
-        completions (list): list of completions in the
+        completions (list | ExpirationTimeline): list of completions in the
         form of: {
             'name': 'training program name (string)', 
             'expires': 'date string in the format m/d/yyyy'
         }
-        expiration_date (str): date string in the format m/d/yyyy
+        or their expirations, see index_program_expirations
+        expiration_date (datetime): expiration date
         expires_in_days (int): time period in which experiation occurs
 
     Returns:
         dict: index of training program names and their expiration date
     '''
-    # create a program index with programs that expire within n days
-    expiring_soon = {}
-    for completion in completions:
-        # validate the completion data
-        program = completion.get('name')
-        if not program:
-            continue
-
-        expiration = date_from_string(completion.get('expires'))
-        if not expiration:
-            continue
+    if not isinstance(completions, ExpirationTimeline):
+        completions = index_program_expirations(completions)
 
-        delta = expiration - expiration_date
-        if delta.days >= 0 and delta.days <= expires_in_days:
-            expiring_soon[program] = completion['expires']
-
-    return expiring_soon
+    return {
+        program['name']: program['expiration']
+        for program in completions.expired_training(
+            expiration_date.toordinal(), expires_in_days)
+        if program['status'] == 'expires soon'
+    }
 
 
 def generate_expiration_report_by_date(training_records, expiration):
@@ -266,8 +334,8 @@ def generate_expiration_report_by_date(training_records, expiration):
     indicated by the 'status' field in the returned list.
 
     Parameters:
-        training_records (list): list of training records in the
-        form of: {
+        training_records (list | CompletionStore): list of training records
+        in the form of: {
             'name': 'employee (string)', 
             'completions': [
                 {
@@ -276,6 +344,8 @@ def generate_expiration_report_by_date(training_records, expiration):
                 }
             ]
         }
+        or TrainingRecords, or a completion store or database built from
+        them
 
     Returns:
         list: list of employees in the form: {
@@ -289,45 +359,358 @@ def generate_expiration_report_by_date(training_records, expiration):
             ]
         }
     '''
-    expiration_date = date_from_string(expiration)
-    report = []
-    for record in training_records:
-        if 'completions' not in record:
-            continue
+    if isinstance(training_records, CompletionStore):
+        import vectorized
+        return vectorized.expiration_report(training_records, expiration)
+    if isinstance(training_records, (TrainingDatabase, MappedIndex)):
+        return training_records.expiration_report(expiration)
 
-        programs = []
-        expired_programs = index_expired_programs(
-            record['completions'],
-            expiration_date
-        )
-        for program in expired_programs:
-            programs.append({
-                'name': program,
-                'expiration': expired_programs[program],
-                'status': 'expired'
-            })
-
-        programs_expiring_next_month = index_expiring_programs(
-            record['completions'],
-            expiration_date,
+    cutoff = date_ordinal(expiration)
+    report = []
+    for record in validate_training_records(
+            training_records, reports=('expiration',)):
+        programs = expired_training(
+            [
+                (program, expires, label)
+                for program, _, expires, label in record.completions
+                if expires
+            ],
+            cutoff,
             30
         )
-        for program in programs_expiring_next_month:
-            programs.append({
-                'name': program,
-                'expiration': programs_expiring_next_month[program],
-                'status': 'expires soon'
-            })
-
         if programs:
             report.append({
-                'name': record['name'],
+                'name': record.name,
                 'expired_training': programs
             })
 
     return sorted(report, key=lambda x: x['name'])
 
 
+class ReportEngine:
+    '''
+    Builds all three reports in a single scan of the training records.
+
+    Every record's completions are walked exactly once. While walking, the
+    engine counts program completions (report 1), collects the employees who
+    completed a program within the fiscal year (report 2) and tracks the
+    expiration state of each program (report 3). The results are identical
+    to the ones produced by count_program_completions,
+    generate_completion_report_by_year and generate_expiration_report_by_date.
+
+    The training records are validated with the dates of the selected
+    reports only, see validation.validate_record. The program totals are
+    always counted, as they also list the programs of report 2.
+
+    Parameters:
+        fiscal_year (int): year in the format yyyy
+        expiration (str): date string in the format m/d/yyyy
+        expires_in_days (int): time period in which experiation occurs
+        reports (tuple): reports to build, any of REPORTS
+        horizons (tuple): time periods in days, sorted and unique, which
+        replace expires_in_days, see expiration.tiered_expired_training
+    '''
+
+    def __init__(self, fiscal_year, expiration, expires_in_days=30,
+                 reports=REPORTS, horizons=None):
+        self.reports = reports
+        self.cutoff = None
+        if 'expiration' in reports:
+            self.cutoff = date_ordinal(expiration)
+        self.expires_in_days = expires_in_days
+        self.horizons = horizons
+
+        self.fiscal_year_start = None
+        self.fiscal_year_end = None
+        if fiscal_year and 'by_year' in reports:
+            self.fiscal_year_start = datetime(fiscal_year-1, 7, 1)
+            self.fiscal_year_end = datetime(fiscal_year, 6, 30)
+
+        self.totals = {}
+        self.completed_in_fiscal_year = {}
+        self.expiration_entries = []
+
+    def add_record(self, record):
+        '''
+        Feeds a single training record into all three reports.
+
+        Parameters:
+            record (TrainingRecord): training record checked by
+            validation.validate_record, whose completions all have a program
+            name and parsed dates. A training record in the form of: {
+                'name': 'employee (string)',
+                'completions': [
+                    {
+                        'name': 'training program name (string)',
+                        'timestamp': 'date string in the format m/d/yyyy',
+                        'expires': 'date string in the format m/d/yyyy'
+                    }
+                ]
+            }
+            is validated first.
+        '''
+        if not isinstance(record, TrainingRecord):
+            record, _ = validation.validate_record(record, self.reports)
+            if record is None:
+                return
+
+        programs = set()
+        expirations = []
+        start, end = self.fiscal_year_start, self.fiscal_year_end
+
+        for program, timestamp, expires, label in record.completions:
+            programs.add(program)
+            if start and timestamp and start <= timestamp <= end:
+                self.completed_in_fiscal_year.setdefault(
+                    program, set()).add(record.name)
+            if expires:
+                expirations.append((program, expires, label))
+
+        for program in programs:
+            self.totals[program] = self.totals.get(program, 0) + 1
+
+        if self.cutoff is None:
+            return
+        if self.horizons:
+            programs = tiered_expired_training(
+                expirations, self.cutoff, self.horizons)
+        else:
+            programs = expired_training(
+                expirations, self.cutoff, self.expires_in_days)
+        if programs:
+            self.expiration_entries.append({
+                'name': record.name,
+                'expired_training': programs
+            })
+
+    def add_records(self, training_records):
+        for record in training_records:
+            self.add_record(record)
+        return self
+
+    def merge(self, other):
+        '''
+        Adds the partial reports of another engine, built with the same
+        parameters from records that follow the records of this engine.
+
+        Parameters:
+            other (ReportEngine): engine with partial reports
+        '''
+        for program, count in other.totals.items():
+            self.totals[program] = self.totals.get(program, 0) + count
+        for program, employees in other.completed_in_fiscal_year.items():
+            self.completed_in_fiscal_year.setdefault(
+                program, set()).update(employees)
+        self.expiration_entries.extend(other.expiration_entries)
+        return self
+
+    def completion_totals(self):
+        '''
+        Returns:
+            dict: report 1, see count_program_completions
+        '''
+        return {program: self.totals[program] for program in sorted(self.totals)}
+
+    def completion_report_by_year(self, program_filter=None):
+        '''
+        Parameters:
+            program_filter (list): list of training program names, defaults
+            to all training programs
+
+        Returns:
+            dict: report 2, see generate_completion_report_by_year
+        '''
+        return {
+            program: sorted(self.completed_in_fiscal_year.get(program, ()))
+            for program in program_filter or sorted(self.totals)
+        }
+
+    def expiration_report(self):
+        '''
+        Returns:
+            list: report 3, see generate_expiration_report_by_date
+        '''
+        return sorted(self.expiration_entries, key=lambda x: x['name'])
+
+
+def build_shard(training_records, fiscal_year, expiration, reports=REPORTS,
+                horizons=None, start=0, quarantine=False):
+    '''
+    Validates and builds the partial reports of a shard of raw training
+    records in a worker process.
+
+    Parameters:
+        start (int): position of the shard's first record in the training
+        records, which the problems are reported with
+        quarantine (bool): whether to collect the problems
+
+    Returns:
+        tuple: ReportEngine with the partial reports, and the problems of
+        the shard as JSON Lines, see validation.validate_training_records
+    '''
+    problems = io.StringIO() if quarantine else None
+    engine = ReportEngine(
+        fiscal_year, expiration, reports=reports, horizons=horizons
+    ).add_records(validate_training_records(
+        training_records, problems, reports, start))
+    return engine, problems.getvalue() if quarantine else ''
+
+
+def build_reports_in_parallel(
+        training_records, workers, fiscal_year, expiration, shard_size=1000,
+        reports=REPORTS, horizons=None, quarantine=None):
+    '''
+    Splits the training records into shards and validates and builds
+    partial reports of each shard in a separate process, so the dates are
+    parsed by the workers. The partial reports are merged in the order of
+    the shards, so the reports are identical to the ones built by a single
+    ReportEngine.
+
+    Parameters:
+        training_records (iterable): raw training records, see ReportEngine
+        workers (int): number of worker processes
+        fiscal_year (int): year in the format yyyy
+        expiration (str): date string in the format m/d/yyyy
+        shard_size (int): number of training records per shard
+        reports (tuple): reports to build, see ReportEngine
+        horizons (tuple): time periods of report 3, see ReportEngine
+        quarantine (file): open text file the problems of the shards are
+        written to in shard order, see validation.validate_training_records
+
+    Returns:
+        ReportEngine: engine with the merged reports
+    '''
+    from concurrent.futures import ProcessPoolExecutor
+
+    engine = ReportEngine(
+        fiscal_year, expiration, reports=reports, horizons=horizons)
+    training_records = iter(training_records)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # limit the shards in flight, so records are not read faster
+        # than they are processed
+        pending = deque()
+        start = 0
+
+        def merge():
+            shard, problems = pending.popleft().result()
+            engine.merge(shard)
+            if quarantine is not None:
+                quarantine.write(problems)
+
+        while shard := list(islice(training_records, shard_size)):
+            pending.append(executor.submit(
+                build_shard, shard, fiscal_year, expiration, reports,
+                horizons, start, quarantine is not None))
+            start += len(shard)
+            if len(pending) >= 2 * workers:
+                merge()
+        while pending:
+            merge()
+
+    return engine
+
+
+def parse_fiscal_years(value):
+    '''
+    Parses a comma separated list of fiscal years and ranges of fiscal
+    years, e.g. '2019-2021,2024' is [2019, 2020, 2021, 2024].
+
+    Parameters:
+        value (str): fiscal years in the format yyyy
+
+    Returns:
+        list: list of unique fiscal years
+
+    Raises:
+        ArgumentTypeError: if a year is invalid, or a range is incomplete or
+        ends before it starts
+    '''
+    fiscal_years = []
+    for part in value.split(','):
+        start, separator, end = part.partition('-')
+        try:
+            start = int(start)
+            end = int(end) if separator else start
+        except ValueError:
+            raise argparse.ArgumentTypeError(f'invalid fiscal year: {part}')
+        if end < start:
+            raise argparse.ArgumentTypeError(
+                f'fiscal year range ends before it starts: {part}')
+        fiscal_years.extend(range(start, end + 1))
+    if not fiscal_years:
+        raise argparse.ArgumentTypeError(f'no fiscal years: {value}')
+    return list(dict.fromkeys(fiscal_years))
+
+
+def parse_horizons(value):
+    '''
+    Parses a comma separated list of time periods in days, e.g. '7,30,90'.
+
+    Parameters:
+        value (str): time periods in days
+
+    Returns:
+        tuple: sorted tuple of unique time periods
+    '''
+    try:
+        horizons = {int(part) for part in value.split(',')}
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'invalid horizons: {value}')
+    if min(horizons) < 0:
+        raise argparse.ArgumentTypeError(f'invalid horizons: {value}')
+    return tuple(sorted(horizons))
+
+
+def parse_expirations(value):
+    '''
+    Parses a comma separated list of dates and monthly ranges of dates.
+    A range repeats the day of its first date every month until its last
+    date. If the first date is the last day of a month, the range consists
+    of month ends, e.g. '1/31/2024-4/30/2024' is
+    ['1/31/2024', '2/29/2024', '3/31/2024', '4/30/2024'].
+
+    Parameters:
+        value (str): dates in the format m/d/yyyy
+
+    Returns:
+        list: list of unique date strings in the format m/d/yyyy
+
+    Raises:
+        ArgumentTypeError: if a date is invalid, or a range is incomplete or
+        ends before it starts
+    '''
+    expirations = []
+    for part in value.split(','):
+        first, separator, last = part.partition('-')
+        start = date_from_string(first.strip())
+        end = date_from_string(last.strip()) if separator else start
+        if not start or not end:
+            raise argparse.ArgumentTypeError(f'invalid date: {part}')
+        if end < start:
+            raise argparse.ArgumentTypeError(
+                f'date range ends before it starts: {part}')
+        if not separator:
+            expirations.append(first.strip())
+            continue
+
+        import calendar
+        month_end = start.day == calendar.monthrange(
+            start.year, start.month)[1]
+        year, month = start.year, start.month
+        while True:
+            days = calendar.monthrange(year, month)[1]
+            day = days if month_end else min(start.day, days)
+            if datetime(year, month, day) > end:
+                break
+            expirations.append(f'{month}/{day}/{year}')
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+    if not expirations:
+        raise argparse.ArgumentTypeError(f'no dates: {value}')
+    return list(dict.fromkeys(expirations))
+
+
 def parse_arguments():
     parser = argparse.ArgumentParser(description='''
         Rinno Train is a reporting tool for training status of department
@@ -347,69 +730,345 @@ def parse_arguments():
         or will expire within a month of the specified date.
     ''')
 
-    parser.add_argument('-i', '--input_file', type=str, required=True,
-                        help='Path to a training records JSON file.')
-
-    parser.add_argument('-x', '--expiration', type=str, required=False,
+    parser.add_argument('-i', '--input_file', type=str, required=False,
+                        action='append',
+                        help='''Path to a training records JSON file, or a
+                        JSON Lines file with one training record per line.
+                        Can be repeated and be a quoted glob pattern, e.g.
+                        "exports/*.json". Employees that appear in several
+                        files are merged.''')
+
+    parser.add_argument('-s', '--state', type=str, required=False,
+                        help='''Path to a report state file. With
+                        --input_file the state is built from the training
+                        records and saved, with --delta it is loaded and
+                        updated.''')
+
+    parser.add_argument('-d', '--delta', type=str, required=False,
+                        help='''Path to a training records file with new or
+                        changed employees, which replace their previous
+                        training records in the report state. Requires
+                        --state.''')
+
+    parser.add_argument('-x', '--expiration', type=parse_expirations,
+                        required=False,
                         help='''The expiration date for the expiration report 
                         expressed in a quoted string in the format m/d/Y, 
-                        e.g. 2/29/2024. Defaults to today.''')
-
-    parser.add_argument('-y', '--fiscal_year', type=int, required=False,
+                        e.g. 2/29/2024. Defaults to today. Several dates
+                        are separated by commas, and a monthly range is
+                        expressed as first-last date, e.g. 1/31/2024-12/31/2024
+                        for all month ends of 2024. Each date is written to
+                        its own expiration_by_date_yyyy-mm-dd.json file.''')
+
+    parser.add_argument('-y', '--fiscal_year', type=parse_fiscal_years,
+                        required=False,
                         help='''The fiscal year for the completion report. 
-                        Defaults to the current year.''')
+                        Defaults to the current year. Several years are
+                        separated by commas, and a range is expressed as
+                        first-last year, e.g. 2019-2026. Each year is
+                        written to its own completion_by_year_yyyy.json
+                        file.''')
+
+    parser.add_argument('--horizons', type=parse_horizons, required=False,
+                        help='''Comma separated time periods in days for the
+                        expiration report, e.g. 7,30,90. Programs expiring
+                        soon are reported with the shortest period they
+                        expire within, in an additional expires_in_days
+                        field. Defaults to a single period of 30 days.''')
+
+    parser.add_argument('-c', '--cache', type=str, required=False,
+                        help='''Directory for a binary cache of the parsed
+                        training records. Runs on an unchanged input file
+                        read the cache instead of the JSON file.''')
+
+    parser.add_argument('--database', type=str, required=False,
+                        help='''Path to a SQLite database of training records
+                        written by database.py, which the reports are
+                        queried from instead of an input file.''')
+
+    parser.add_argument('--index', type=str, required=False,
+                        help='''Path to a binary index file of training
+                        records written by mapped.py, which the reports are
+                        read from instead of an input file. Processes
+                        reading the same index file share its memory.''')
+
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help='''The number of worker processes used to
+                        generate the reports for a single fiscal year and
+                        expiration date. Defaults to 1.''')
+
+    parser.add_argument('-r', '--report', choices=REPORTS, action='append',
+                        help='''Report to generate: totals (report 1),
+                        by_year (report 2) or expiration (report 3). Can be
+                        repeated. Defaults to all reports. Only the data the
+                        selected reports need is parsed.''')
+
+    parser.add_argument('-q', '--quarantine', type=str, required=False,
+                        help='''Path to a JSON Lines file the malformed rows
+                        of the training records are written to, one line per
+                        problem with its reason. Records without an employee
+                        name and completions without a program name are left
+                        out of the reports, and dates that can't be parsed
+                        are ignored.''')
+
+    parser.add_argument('-f', '--format', choices=FORMATS, default='pretty',
+                        help='''Format of the report files: indented JSON
+                        (pretty), JSON without whitespace (compact) or one
+                        JSON value per line (jsonl). Defaults to pretty.''')
+
+    parser.add_argument('--profile', action='store_true',
+                        help='''Print wall time, number of calls and peak
+                        memory of each phase and of the key functions.''')
+
+    parser.add_argument('--profile_output', type=str, required=False,
+                        help='''Path to a JSON file the profile is written
+                        to. Implies --profile.''')
 
     parser.add_argument('program_filter', nargs='*', help='''The names of the
                         training programs to include in the completion report.
                         If no program names are specified, all programs will
                         be included.''')
 
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.delta and not args.state:
+        parser.error('--delta requires --state')
+    if args.database and args.index:
+        parser.error('--database and --index can not be combined')
+    stored = args.database or args.index
+    if stored and (args.input_file or args.state):
+        parser.error('--database and --index can not be combined with '
+                     '--input_file or --state')
+    if not args.delta and not args.input_file and not stored:
+        parser.error('--input_file is required without --delta')
+    if args.delta and args.input_file:
+        parser.error('--input_file and --delta can not be combined')
+    if args.quarantine and (stored or args.cache and not args.state):
+        parser.error('--quarantine can not be combined with --database, '
+                     '--index or --cache')
+    if args.horizons and (stored or args.cache and not args.state):
+        parser.error('--horizons can not be combined with --database, '
+                     '--index or --cache')
+    if args.profile_output:
+        args.profile = True
+
+    if args.input_file:
+        try:
+            args.input_file = ingest.expand_paths(args.input_file)
+        except FileNotFoundError as e:
+            parser.error(str(e))
+        if args.cache and len(args.input_file) > 1:
+            parser.error('--cache requires a single input file')
+
+    return args
+
+
+def read_input_files(args):
+    '''
+    Returns:
+        iterable: training records of the input file, streamed from a single
+        file or merged from several files read concurrently
+    '''
+    if len(args.input_file) == 1:
+        return iter_training_records(args.input_file[0])
+    return ingest.read_training_files(args.input_file, args.workers)
+
+
+def build_reports(args, fiscal_years, expirations):
+    '''
+    Builds the selected reports the way selected by the command line
+    arguments. Several fiscal years and expiration dates are looked up in a
+    report state built with a single pass over the training records.
+
+    Parameters:
+        args (Namespace): command line arguments
+        fiscal_years (list): list of fiscal years in the format yyyy
+        expirations (list): list of date strings in the format m/d/yyyy
+
+    Returns:
+        tuple: completion totals, completion reports by fiscal year and
+        expiration reports by expiration date. Reports that were not
+        selected are None and empty dicts.
+    '''
+    selected = args.report or REPORTS
+    if 'by_year' not in selected:
+        fiscal_years = []
+    if 'expiration' not in selected:
+        expirations = []
+
+    if args.database or args.index or args.cache and not args.state:
+        if args.database:
+            store = TrainingDatabase(args.database, create=False)
+        elif args.index:
+            store = MappedIndex(args.index)
+        else:
+            import cache
+            store = cache.load_store(args.input_file[0], args.cache)
+        training_programs = aggregate_training_programs(store)
+        program_filter = args.program_filter or training_programs
+        return (
+            count_program_completions(training_programs, store)
+            if 'totals' in selected else None,
+            {
+                fiscal_year: generate_completion_report_by_year(
+                    store, fiscal_year, program_filter)
+                for fiscal_year in fiscal_years
+            },
+            {
+                expiration: generate_expiration_report_by_date(
+                    store, expiration)
+                for expiration in expirations
+            }
+        )
+
+    fiscal_year = fiscal_years[0] if fiscal_years else None
+    expiration = expirations[0] if expirations else None
+    if args.delta or args.state or len(fiscal_years) > 1 or \
+            len(expirations) > 1:
+        from state import ReportState
+        today = datetime.now()
+        fiscal_year = fiscal_year or today.year
+        expiration = expiration or today.strftime('%m/%d/%Y')
+
+    # every record is validated once, before it reaches the reports, and
+    # the malformed rows are written to the quarantine file. Only the dates
+    # of the selected reports are parsed, unless the state is saved, which
+    # must be complete for later runs.
+    parsed = REPORTS if args.state else selected
+    with open(args.quarantine, 'w') if args.quarantine \
+            else nullcontext() as quarantine:
+        if args.delta:
+            reports = ReportState.load(args.state)
+            reports.fiscal_year = fiscal_year
+            reports.set_expiration(expiration, args.horizons)
+            reports.update(validate_training_records(
+                iter_training_records(args.delta), quarantine))
+        elif args.state or len(fiscal_years) > 1 or len(expirations) > 1:
+            reports = ReportState(
+                fiscal_year, expiration, horizons=args.horizons
+            ).add_records(validate_training_records(
+                read_input_files(args), quarantine, parsed))
+        elif args.workers > 1:
+            # the raw records are validated by the workers
+            reports = build_reports_in_parallel(
+                read_input_files(args), args.workers, fiscal_year,
+                expiration, reports=selected, horizons=args.horizons,
+                quarantine=quarantine)
+        else:
+            reports = ReportEngine(
+                fiscal_year, expiration, reports=selected,
+                horizons=args.horizons
+            ).add_records(validate_training_records(
+                read_input_files(args), quarantine, parsed))
+
+    if args.state:
+        reports.save(args.state)
+
+    completion_totals = None
+    if 'totals' in selected:
+        completion_totals = reports.completion_totals()
+
+    if isinstance(reports, ReportEngine):
+        return (
+            completion_totals,
+            {fiscal_year: reports.completion_report_by_year(
+                args.program_filter)} if fiscal_years else {},
+            {expiration: reports.expiration_report()} if expirations else {}
+        )
+
+    return (
+        completion_totals,
+        {
+            fiscal_year: reports.completion_report_by_year(
+                args.program_filter, fiscal_year)
+            for fiscal_year in fiscal_years
+        },
+        {
+            # looked up while the report is written
+            expiration: reports.iter_expiration_report(expiration)
+            for expiration in expirations
+        }
+    )
+
+
+def instrument(profiler):
+    '''
+    Measures the key functions of the reports with the profiler.
+    '''
+    module = sys.modules[__name__]
+    for name in (
+        'date_from_string',
+        'date_ordinal',
+        'is_within_fiscal_year',
+        'index_expired_programs',
+        'index_expiring_programs',
+        'expired_training',
+    ):
+        profiler.instrument(module, name)
+    profiler.instrument(ReportEngine, 'add_record', 'ReportEngine.add_record')
+    profiler.instrument(validation, 'validate_record')
+    # the dates are parsed while the records are validated
+    profiler.instrument(validation, 'parse_date')
+    profiler.instrument(ingest.decoder, 'raw_decode', 'json decode')
 
 
 def main():
     args = parse_arguments()
     today = datetime.now()
-
-    # Load training data from specified JSON file
-    training_records = None
+    fiscal_years = args.fiscal_year or [today.year]
+    expirations = args.expiration or [today.strftime('%m/%d/%Y')]
+
+    profiler = None
+    phase = lambda name: nullcontext()
+    if args.profile:
+        from profiling import Profiler
+        profiler = Profiler().start()
+        phase = profiler.phase
+        instrument(profiler)
+
+    # Stream training data from specified JSON file and build the selected
+    # reports in a single pass over the training records, or update the
+    # reports of the employees in the delta file
     try:
-        with open(args.input_file, 'r') as file:
-            training_records = json.load(file)
+        with phase('build reports'):
+            completion_totals, completion_reports_by_year, \
+                expiration_reports_by_date = build_reports(
+                    args, fiscal_years, expirations)
     except Exception as e:
         print(e)
         exit(1)
 
-    # Report 1: Count how many people have completed each training
-    training_programs = aggregate_training_programs(training_records)
-    completion_totals = count_program_completions(
-        training_programs,
-        training_records
-    )
+    extension = '.jsonl' if args.format == 'jsonl' else '.json'
 
-    with open('completion_totals.json', 'w') as file:
-        json.dump(completion_totals, file, indent=4, default=str)
+    # Report 1: Count how many people have completed each training
+    if completion_totals is not None:
+        with phase('write completion totals'):
+            write_report(f'completion_totals{extension}', completion_totals,
+                         args.format)
 
     # Report 2: List everyone that completed a given training
     # in a given fiscal year
-    completion_report_by_year = generate_completion_report_by_year(
-        training_records,
-        fiscal_year=args.fiscal_year or today.year,
-        program_filter=args.program_filter or training_programs
-    )
-
-    with open('completion_by_year.json', 'w') as file:
-        json.dump(completion_report_by_year, file, indent=4, default=str)
+    with phase('write completion by year'):
+        for fiscal_year, report in completion_reports_by_year.items():
+            path = f'completion_by_year{extension}'
+            if len(completion_reports_by_year) > 1:
+                path = f'completion_by_year_{fiscal_year}{extension}'
+            write_report(path, report, args.format)
 
     # Report 3: List everyone whose training has expired or will expire
     # within a month of a given date.
-    expiration_report_by_date = generate_expiration_report_by_date(
-        training_records,
-        expiration=args.expiration or today.strftime('%m/%d/%Y')
-    )
-
-    with open('expiration_by_date.json', 'w') as file:
-        json.dump(expiration_report_by_date, file, indent=4, default=str)
+    with phase('write expiration by date'):
+        for expiration, report in expiration_reports_by_date.items():
+            path = f'expiration_by_date{extension}'
+            if len(expiration_reports_by_date) > 1:
+                path = 'expiration_by_date_{:%Y-%m-%d}{}'.format(
+                    date_from_string(expiration), extension)
+            write_report(path, report, args.format)
+
+    if profiler:
+        profiler.stop()
+        print(profiler.format_table())
+        if args.profile_output:
+            profiler.write_json(args.profile_output)
 
 
 if __name__ == '__main__':
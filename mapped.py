@@ -0,0 +1,306 @@
+import argparse
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date
+
+from columnar import NULL_DATE
+from dates import date_ordinal
+from expiration import expired_training
+from ingest import iter_training_records
+from sections import read_sections, write_sections
+from validation import validate_training_records
+
+MAGIC = b'RINNOIDX'
+VERSION = 1
+
+# fields of a completion row, each a 32 bit integer
+ROW_FIELDS = ('program', 'timestamp', 'record', 'expires', 'label')
+ROW_WIDTH = len(ROW_FIELDS)
+PROGRAM, TIMESTAMP, RECORD, EXPIRES, LABEL = range(ROW_WIDTH)
+
+# sections of the file in the order they are written
+SECTIONS = (
+    ('rows', 'i'),
+    ('program_offsets', 'q'),
+    ('program_counts', 'i'),
+    ('record_employee', 'i'),
+    ('record_offsets', 'q'),
+    ('record_rows', 'i'),
+    ('employees_offsets', 'q'),
+    ('employees_data', 'B'),
+    ('programs_offsets', 'q'),
+    ('programs_data', 'B'),
+    ('labels_offsets', 'q'),
+    ('labels_data', 'B'),
+)
+
+
+def compile_index(training_records, path):
+    '''
+    Compiles training records into a read-only binary index file, which
+    MappedIndex maps into memory. The training records are validated, see
+    validation.validate_training_records.
+
+    The file consists of the following sections, see
+    sections.write_sections:
+    rows: one fixed-width row of ROW_FIELDS per completion, sorted by
+    program and timestamp. Programs are numbered alphabetically, and
+    missing or unparsable dates are NULL_DATE.
+    program_offsets, program_counts: the rows of program i are
+    program_offsets[i] to program_offsets[i+1], completed by
+    program_counts[i] records.
+    record_employee, record_offsets, record_rows: the completions of record
+    i, in the order of the training records, are the rows record_rows[j]
+    for j from record_offsets[i] to record_offsets[i+1].
+    employees, programs, labels: string tables of UTF-8 encoded strings,
+    string i is data[offsets[i]:offsets[i+1]]. The labels are the
+    expiration dates the way they were written.
+
+    Parameters:
+        training_records (iterable): training records, see
+        main.ReportEngine.add_record
+        path (str): path to the index file, which is replaced atomically
+    '''
+    employees = _Interned()
+    labels = _Interned()
+    record_employee = array('i')
+    record_offsets = array('q', [0])
+    # (program, timestamp, record, expires, label) in record order
+    completions = []
+
+    for record in validate_training_records(training_records):
+        record_employee.append(employees.id(record.name))
+        for program, timestamp, expires, label in record.completions:
+            completions.append((
+                program,
+                timestamp.toordinal() if timestamp else NULL_DATE,
+                len(record_employee) - 1,
+                expires or NULL_DATE,
+                labels.id(label) if label else -1
+            ))
+        record_offsets.append(len(completions))
+
+    programs = sorted({completion[PROGRAM] for completion in completions})
+    program_ids = {program: i for i, program in enumerate(programs)}
+
+    order = sorted(
+        range(len(completions)),
+        key=lambda i: (program_ids[completions[i][PROGRAM]],
+                       completions[i][TIMESTAMP])
+    )
+    rows = array('i')
+    record_rows = array('i', bytes(4 * len(completions)))
+    program_offsets = array('q', [0] * (len(programs) + 1))
+    program_records = [set() for _ in programs]
+    for row, i in enumerate(order):
+        program, timestamp, record, expires, label = completions[i]
+        program = program_ids[program]
+        rows.extend((program, timestamp, record, expires, label))
+        record_rows[i] = row
+        program_offsets[program + 1] = row + 1
+        program_records[program].add(record)
+
+    sections = {
+        'rows': rows,
+        'program_offsets': program_offsets,
+        'program_counts': array('i', map(len, program_records)),
+        'record_employee': record_employee,
+        'record_offsets': record_offsets,
+        'record_rows': record_rows,
+    }
+    for name, strings in (
+        ('employees', employees.names),
+        ('programs', programs),
+        ('labels', labels.names)
+    ):
+        sections[f'{name}_offsets'], sections[f'{name}_data'] = \
+            _string_table(strings)
+
+    write_sections(path, MAGIC, VERSION, {}, (
+        (name, typecode, sections[name]) for name, typecode in SECTIONS
+    ))
+
+
+class MappedIndex:
+    '''
+    Read-only binary index file written by compile_index, mapped into
+    memory. The sections are memoryviews of the mapping, so nothing is read
+    or copied until a report needs it, and processes mapping the same file
+    share its pages.
+
+    The report functions in main.py accept a mapped index in place of the
+    training records and produce the same reports.
+
+    Parameters:
+        path (str): path to the index file
+
+    Raises:
+        ValueError: if the file is not a compatible index file
+    '''
+
+    def __init__(self, path):
+        _, sections = read_sections(path, MAGIC, VERSION, 'index')
+        for name, section in sections.items():
+            setattr(self, name, section)
+
+        # zero-copy views of the row fields
+        self.timestamps = self.rows[TIMESTAMP::ROW_WIDTH]
+        self.records = self.rows[RECORD::ROW_WIDTH]
+
+        # the programs and expiration dates are few, the employees are
+        # decoded when they are reported
+        self.programs = _decode_all(self.programs_offsets, self.programs_data)
+        self.program_ids = {name: i for i, name in enumerate(self.programs)}
+        self.labels = _decode_all(self.labels_offsets, self.labels_data)
+
+    def __len__(self):
+        return len(self.record_employee)
+
+    def employee(self, record):
+        '''
+        Returns:
+            str: employee name of the record
+        '''
+        i = self.record_employee[record]
+        return str(self.employees_data[
+            self.employees_offsets[i]:self.employees_offsets[i+1]], 'utf-8')
+
+    def program_names(self):
+        '''
+        Returns:
+            list: list of unique training program names sorted alphabetically
+        '''
+        return list(self.programs)
+
+    def count(self, program):
+        '''
+        Returns:
+            int: number of records in which the program was completed
+        '''
+        if program not in self.program_ids:
+            return 0
+        return self.program_counts[self.program_ids[program]]
+
+    def completion_report_by_year(self, fiscal_year, program_filter):
+        '''
+        See main.generate_completion_report_by_year. The completions of a
+        program within the fiscal year are found by binary search of its
+        rows.
+        '''
+        report = {}
+        for program in program_filter:
+            if not fiscal_year or program not in self.program_ids:
+                report[program] = []
+                continue
+
+            report[program] = sorted(
+                self.completed_employees(fiscal_year, program))
+        return report
+
+    def completed_employees(self, fiscal_year, program):
+        '''
+        Returns:
+            set: names of the employees who have completed the program in
+            the fiscal year, found by binary search of the program's rows
+        '''
+        if not fiscal_year or program not in self.program_ids:
+            return set()
+
+        i = self.program_ids[program]
+        first = self.program_offsets[i]
+        last = self.program_offsets[i+1]
+        start = bisect_left(self.timestamps,
+                            date(fiscal_year-1, 7, 1).toordinal(),
+                            first, last)
+        end = bisect_right(self.timestamps,
+                           date(fiscal_year, 6, 30).toordinal(),
+                           start, last)
+        return {self.employee(record) for record in self.records[start:end]}
+
+    def expiration_report(self, expiration, expires_in_days=30):
+        '''
+        See main.generate_expiration_report_by_date.
+        '''
+        return sorted(
+            self.iter_expiration_entries(expiration, expires_in_days),
+            key=lambda x: x['name']
+        )
+
+    def iter_expiration_entries(self, expiration, expires_in_days=30):
+        '''
+        Returns:
+            iterator: entries of report 3 in the order of the training
+            records, computed while they are consumed
+        '''
+        cutoff = date_ordinal(expiration)
+        rows, record_rows = self.rows, self.record_rows
+        offsets = self.record_offsets
+
+        for record in range(len(self)):
+            completions = []
+            for j in range(offsets[record], offsets[record+1]):
+                row = record_rows[j] * ROW_WIDTH
+                if rows[row + EXPIRES] != NULL_DATE:
+                    completions.append((
+                        self.programs[rows[row + PROGRAM]],
+                        rows[row + EXPIRES],
+                        self.labels[rows[row + LABEL]]
+                    ))
+
+            programs = expired_training(completions, cutoff, expires_in_days)
+            if programs:
+                yield {
+                    'name': self.employee(record),
+                    'expired_training': programs
+                }
+
+
+class _Interned:
+    def __init__(self):
+        self.names = []
+        self.ids = {}
+
+    def id(self, name):
+        if name not in self.ids:
+            self.ids[name] = len(self.names)
+            self.names.append(name)
+        return self.ids[name]
+
+
+def _string_table(strings):
+    offsets = array('q', [0])
+    data = bytearray()
+    for string in strings:
+        data += string.encode('utf-8')
+        offsets.append(len(data))
+    return offsets, array('B', data)
+
+
+def _decode_all(offsets, data):
+    return [
+        str(data[offsets[i]:offsets[i+1]], 'utf-8')
+        for i in range(len(offsets) - 1)
+    ]
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='''
+        Compiles a training records file into a read-only binary index file,
+        which main.py can generate the reports from with --index. Processes
+        reading the same index file share its memory.
+    ''')
+    parser.add_argument('-i', '--input_file', type=str, required=True,
+                        help='Path to the training records JSON file.')
+    parser.add_argument('-o', '--output_file', type=str, required=True,
+                        help='''Path to the index file. An existing index file
+                        is replaced.''')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    compile_index(iter_training_records(args.input_file), args.output_file)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+import functools
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+class Profiler:
+    '''
+    Records wall time, number of calls and peak memory of the phases of a
+    run and of instrumented functions.
+
+    Functions are instrumented by replacing them with a measuring wrapper
+    on their module or class, so nothing is measured, and nothing slows
+    down, unless a profiler is created. Peak memory is the highest memory
+    allocated by Python, as traced by tracemalloc, while the phase or one
+    of the function calls was running.
+    '''
+
+    def __init__(self):
+        # name -> {'kind': 'phase' | 'function', 'calls', 'seconds', 'peak'}
+        self.stats = {}
+        self._instrumented = []
+        # peak memory of the measurements that are currently running
+        self._running = []
+
+    def start(self):
+        tracemalloc.start()
+        return self
+
+    def stop(self):
+        self._fold_peak()
+        tracemalloc.stop()
+        for owner, attribute, original in reversed(self._instrumented):
+            setattr(owner, attribute, original)
+        self._instrumented = []
+
+    def _fold_peak(self):
+        # the traced peak is global, so it is handed to every running
+        # measurement before it is reset for the next one
+        if not tracemalloc.is_tracing():
+            return
+        peak = tracemalloc.get_traced_memory()[1]
+        for measurement in self._running:
+            measurement[0] = max(measurement[0], peak)
+        tracemalloc.reset_peak()
+
+    @contextmanager
+    def measure(self, name, kind='phase'):
+        '''
+        Measures the enclosed block as one call of the named phase or
+        function.
+        '''
+        self._fold_peak()
+        measurement = [0]
+        self._running.append(measurement)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self._fold_peak()
+            self._running.pop()
+
+            stats = self.stats.setdefault(name, {
+                'kind': kind, 'calls': 0, 'seconds': 0.0, 'peak': 0
+            })
+            stats['calls'] += 1
+            stats['seconds'] += seconds
+            stats['peak'] = max(stats['peak'], measurement[0])
+
+    def phase(self, name):
+        return self.measure(name, 'phase')
+
+    def instrument(self, owner, attribute, name=None):
+        '''
+        Replaces a function of a module, class or object with a wrapper that
+        measures every call. The original is restored by stop.
+
+        Parameters:
+            owner (object): module, class or object holding the function
+            attribute (str): name of the function
+            name (str): name in the report, defaults to the attribute
+        '''
+        original = getattr(owner, attribute)
+        name = name or attribute
+
+        @functools.wraps(original)
+        def wrapper(*args, **kwargs):
+            with self.measure(name, 'function'):
+                return original(*args, **kwargs)
+
+        self._instrumented.append((owner, attribute, original))
+        setattr(owner, attribute, wrapper)
+
+    def report(self):
+        '''
+        Returns:
+            list: list of measurements in the form: {
+                'name': 'phase or function name (string)',
+                'kind': 'phase' | 'function',
+                'calls': number of calls (int),
+                'seconds': total wall time (float),
+                'peak_memory': peak traced memory in bytes (int)
+            }
+        '''
+        return [
+            {
+                'name': name,
+                'kind': stats['kind'],
+                'calls': stats['calls'],
+                'seconds': stats['seconds'],
+                'peak_memory': stats['peak']
+            }
+            for name, stats in self.stats.items()
+        ]
+
+    def format_table(self):
+        '''
+        Returns:
+            str: the report as a text table
+        '''
+        lines = [
+            f'{"":<36}{"calls":>10}{"time (ms)":>14}{"peak (MB)":>12}'
+        ]
+        for kind in ('phase', 'function'):
+            for row in self.report():
+                if row['kind'] != kind:
+                    continue
+                lines.append(
+                    f'{row["name"]:<36}{row["calls"]:>10}'
+                    f'{row["seconds"] * 1000:>14.2f}'
+                    f'{row["peak_memory"] / 2**20:>12.2f}'
+                )
+        return '\n'.join(lines)
+
+    def write_json(self, path):
+        with open(path, 'w') as file:
+            json.dump(self.report(), file, indent=4)
@@ -0,0 +1,137 @@
+import heapq
+from itertools import islice
+
+import dates
+from dates import date_ordinal
+from expiration import expired_training
+from index import FiscalYearIndex
+from mapped import MappedIndex
+from state import ReportState
+from validation import validate_training_records
+
+# sort keys of expiration_page
+SORT_KEYS = ('name', 'oldest_expiration', 'expired_programs')
+
+
+def expiration_page(source, expiration, limit, offset=0, sort='name',
+                    expires_in_days=30):
+    '''
+    Returns one page of report 3 without building and sorting the whole
+    report. The entries are computed one at a time and only the first
+    offset + limit of them in sort order are kept in a heap.
+
+    Parameters:
+        source (iterable | ReportState | MappedIndex): training records, see
+        main.generate_expiration_report_by_date, or a report state or
+        mapped index built from them
+        expiration (str): date string in the format m/d/yyyy
+        limit (int): maximum number of entries
+        offset (int): number of entries to skip
+        sort (str): 'name' sorts by employee name, like the report,
+        'oldest_expiration' lists the employees with the longest expired
+        program first and 'expired_programs' the employees with the most
+        expired programs first, both followed by employees with programs
+        expiring soon only. Ties are sorted by employee name.
+        expires_in_days (int): time period in which experiation occurs
+
+    Returns:
+        list: entries of report 3, see main.generate_expiration_report_by_date
+
+    Raises:
+        ValueError: if the sort key is unknown
+    '''
+    if sort not in SORT_KEYS:
+        raise ValueError(f'unknown sort key: {sort}')
+
+    if isinstance(source, ReportState):
+        # already listed by employee name, one employee at a time
+        entries = source.iter_expiration_report(expiration)
+        if sort == 'name':
+            return list(islice(entries, offset, offset + limit))
+    elif isinstance(source, MappedIndex):
+        entries = source.iter_expiration_entries(expiration, expires_in_days)
+    else:
+        entries = iter_expiration_entries(source, expiration, expires_in_days)
+
+    return heapq.nsmallest(
+        offset + limit, entries, key=_sort_key(sort))[offset:]
+
+
+def iter_expiration_entries(training_records, expiration, expires_in_days=30):
+    '''
+    Returns:
+        iterator: entries of report 3 in the order of the training records,
+        computed while they are consumed
+    '''
+    cutoff = date_ordinal(expiration)
+    for record in validate_training_records(training_records):
+        programs = expired_training(
+            [
+                (program, expires, label)
+                for program, _, expires, label in record.completions
+                if expires
+            ],
+            cutoff,
+            expires_in_days
+        )
+        if programs:
+            yield {'name': record.name, 'expired_training': programs}
+
+
+def _sort_key(sort):
+    if sort == 'name':
+        return lambda entry: entry['name']
+
+    def key(entry):
+        expired = [
+            date_ordinal(program['expiration'])
+            for program in entry['expired_training']
+            if program['status'] == 'expired'
+        ]
+        if not expired:
+            return (1, 0, entry['name'])
+        if sort == 'oldest_expiration':
+            return (0, min(expired), entry['name'])
+        return (0, -len(expired), entry['name'])
+
+    return key
+
+
+def completion_page(source, fiscal_year, program, limit, offset=0):
+    '''
+    Returns one page of the employees who have completed a program in a
+    fiscal year, sorted by name. A FiscalYearIndex sorts each program's
+    employees once and returns every page as a slice of them. Otherwise only
+    the first offset + limit employees are selected with a heap.
+
+    Parameters:
+        source (iterable | FiscalYearIndex | ReportState | MappedIndex):
+        training records, see main.generate_completion_report_by_year, or
+        an index, report state or mapped index built from them
+        fiscal_year (int): year in the format yyyy
+        program (str): training program name
+        limit (int): maximum number of employees
+        offset (int): number of employees to skip
+
+    Returns:
+        list: sorted list of employee names
+    '''
+    if isinstance(source, FiscalYearIndex):
+        return source.employees(fiscal_year, program)[offset:offset + limit]
+
+    if isinstance(source, ReportState):
+        employees = source.fiscal_years.get(fiscal_year, {}).get(program, ())
+    elif isinstance(source, MappedIndex):
+        employees = source.completed_employees(fiscal_year, program)
+    else:
+        employees = {
+            record.name
+            for record in validate_training_records(source)
+            if any(
+                completion.program == program and completion.timestamp and
+                dates.fiscal_year(completion.timestamp) == fiscal_year
+                for completion in record.completions
+            )
+        }
+
+    return heapq.nsmallest(offset + limit, employees)[offset:]
@@ -0,0 +1,92 @@
+import json
+import mmap
+import struct
+import sys
+
+from writer import atomic_open
+
+# magic, version, length of the JSON header
+PREAMBLE = struct.Struct('<8sII')
+
+
+def write_sections(path, magic, version, header, sections):
+    '''
+    Writes a binary file of raw sections, e.g. the columns of the cache or
+    the rows of the mapped index. The file starts with the magic, the
+    version and a JSON header listing the sections, followed by the
+    sections, each aligned to 8 bytes so they can be mapped without
+    copying. The file is replaced atomically.
+
+    Parameters:
+        path (str): path to the file
+        magic (bytes): 8 bytes identifying the kind of file
+        version (int): version of the file format
+        header (dict): JSON serializable metadata, to which the byte order
+        and the list of sections are added
+        sections (iterable): sections in the order they are written, in the
+        form of: ('name', typecode of the items, array or memoryview)
+    '''
+    sections = [
+        (name, typecode, memoryview(data)) for name, typecode, data in sections
+    ]
+    header = {**header, 'byteorder': sys.byteorder, 'sections': []}
+    offset = 0
+    for name, typecode, data in sections:
+        header['sections'].append([name, typecode, offset, data.nbytes])
+        offset += _aligned(data.nbytes)
+
+    header = json.dumps(header, separators=(',', ':')).encode()
+    header += b' ' * (_aligned(PREAMBLE.size + len(header)) -
+                      PREAMBLE.size - len(header))
+
+    with atomic_open(path, 'wb') as file:
+        file.write(PREAMBLE.pack(magic, version, len(header)))
+        file.write(header)
+        for _, _, data in sections:
+            file.write(data)
+            file.write(b'\0' * (_aligned(data.nbytes) - data.nbytes))
+
+
+def read_sections(path, magic, version, kind):
+    '''
+    Maps a file written by write_sections into memory. Nothing is read or
+    copied until the sections are used.
+
+    Parameters:
+        path (str): path to the file
+        magic (bytes): expected magic
+        version (int): expected version of the file format
+        kind (str): kind of file in error messages, e.g. 'cache'
+
+    Returns:
+        tuple: (header, dict of section names and read-only memoryviews of
+        the mapped file cast to their typecode)
+
+    Raises:
+        ValueError: if the file is not a compatible file of the kind
+    '''
+    with open(path, 'rb') as file:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(buffer) < PREAMBLE.size:
+        raise ValueError(f'{path} is not a compatible {kind} file')
+    file_magic, file_version, header_size = PREAMBLE.unpack_from(buffer)
+    if file_magic != magic or file_version != version:
+        raise ValueError(f'{path} is not a compatible {kind} file')
+
+    header = json.loads(buffer[PREAMBLE.size:PREAMBLE.size + header_size])
+    if header['byteorder'] != sys.byteorder:
+        raise ValueError(f'{path} was written on a different platform')
+
+    data = memoryview(buffer)[PREAMBLE.size + header_size:]
+    sections = {}
+    for name, typecode, offset, size in header['sections']:
+        if offset + size > len(data):
+            raise ValueError(f'{path} is truncated')
+        sections[name] = data[offset:offset + size].cast(typecode)
+
+    return header, sections
+
+
+def _aligned(size, alignment=8):
+    return (size + alignment - 1) // alignment * alignment
@@ -0,0 +1,263 @@
+import argparse
+import json
+import threading
+from datetime import datetime
+from functools import lru_cache
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from cache import file_fingerprint
+from dates import parse_date
+from ingest import iter_training_records
+from queries import SORT_KEYS, completion_page, expiration_page
+from state import ReportState
+from writer import FORMATS, iter_report
+
+# number of computed responses kept per dataset
+CACHE_SIZE = 256
+
+CONTENT_TYPES = {
+    'pretty': 'application/json',
+    'compact': 'application/json',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+class ReportDataset:
+    '''
+    Training records loaded into a report state once, from which all three
+    reports are looked up for any fiscal year, expiration date and program
+    filter. The most recently requested responses are cached.
+
+    Parameters:
+        path (str): path to a training records file, or to a report state
+        file written by main.py --state
+        is_state (bool): whether the path is a report state file
+        cache_size (int): maximum number of cached responses
+    '''
+
+    def __init__(self, path, is_state=False, cache_size=CACHE_SIZE):
+        self.path = path
+        self.is_state = is_state
+        # taken before reading, so a change while loading triggers a reload
+        self.fingerprint = file_fingerprint(path)
+
+        if is_state:
+            self.state = ReportState.load(path)
+        else:
+            today = datetime.now()
+            self.state = ReportState(
+                today.year, today.strftime('%m/%d/%Y')
+            ).add_records(iter_training_records(path))
+
+        # a new dataset starts with an empty cache
+        self.response = lru_cache(maxsize=cache_size)(self._response)
+
+    def changed(self):
+        '''
+        Returns:
+            bool: True if the file has changed since it was loaded
+        '''
+        try:
+            return file_fingerprint(self.path) != self.fingerprint
+        except OSError:
+            return False
+
+    def _response(self, report, fiscal_year, expiration, program_filter,
+                  format, page=None):
+        # page is None for the whole report, otherwise (limit, offset, sort)
+        if report == 'completion_totals':
+            result = self.state.completion_totals()
+        elif report == 'completion_by_year' and page:
+            limit, offset, _ = page
+            result = {
+                program: completion_page(
+                    self.state, fiscal_year, program, limit, offset)
+                for program in program_filter or self.state.completion_totals()
+            }
+        elif report == 'completion_by_year':
+            result = self.state.completion_report_by_year(
+                list(program_filter), fiscal_year)
+        elif page:
+            result = expiration_page(self.state, expiration, *page)
+        else:
+            result = self.state.iter_expiration_report(expiration)
+        return ''.join(iter_report(result, format)).encode()
+
+
+class ReportServer(ThreadingHTTPServer):
+    '''
+    HTTP server answering report requests from a dataset loaded once.
+    Requests are handled concurrently in threads. Reloading builds a new
+    dataset while the current one keeps serving requests, and replaces it
+    when complete.
+
+    Parameters:
+        address (tuple): host and port to listen on
+        dataset (ReportDataset): the initial dataset
+    '''
+    daemon_threads = True
+
+    def __init__(self, address, dataset):
+        super().__init__(address, ReportRequestHandler)
+        self.dataset = dataset
+        self.reload_lock = threading.Lock()
+
+    def reload(self, force=False):
+        '''
+        Reloads the dataset if its file has changed, or if forced.
+
+        Returns:
+            bool: True if the dataset was reloaded
+        '''
+        with self.reload_lock:
+            dataset = self.dataset
+            if not force and not dataset.changed():
+                return False
+            self.dataset = ReportDataset(
+                dataset.path, dataset.is_state,
+                dataset.response.cache_info().maxsize
+            )
+            return True
+
+
+class ReportRequestHandler(BaseHTTPRequestHandler):
+    '''
+    GET /completion_totals
+    GET /completion_by_year?fiscal_year=2024&program=X-Ray+Safety&program=...
+    GET /expiration_by_date?expiration=10/1/2023&limit=50&sort=...
+    POST /reload?force=1
+
+    The fiscal year and expiration date default to today, the programs to
+    all programs, like the command line arguments of main.py. The format
+    parameter selects compact (default), pretty or jsonl.
+
+    With a limit, and optionally an offset, one page of the employees is
+    returned, for report 2 the page of each program. Report 3 pages are
+    sorted by name, oldest_expiration or expired_programs, see
+    queries.expiration_page.
+    '''
+    reports = ('completion_totals', 'completion_by_year', 'expiration_by_date')
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        report = url.path.strip('/')
+        if report not in self.reports:
+            self.send_failure(HTTPStatus.NOT_FOUND, f'Unknown report {report}')
+            return
+
+        query = parse_qs(url.query)
+        today = datetime.now()
+        try:
+            fiscal_year = int(query.get('fiscal_year', [today.year])[-1])
+            expiration = query.get(
+                'expiration', [today.strftime('%m/%d/%Y')])[-1]
+            if not parse_date(expiration):
+                raise ValueError(f'Invalid expiration date {expiration}')
+            format = query.get('format', ['compact'])[-1]
+            if format not in FORMATS:
+                raise ValueError(f'Unknown format {format}')
+            page = None
+            if 'limit' in query:
+                page = (
+                    int(query['limit'][-1]),
+                    int(query.get('offset', [0])[-1]),
+                    query.get('sort', ['name'])[-1]
+                )
+                if page[0] < 0 or page[1] < 0:
+                    raise ValueError('limit and offset can not be negative')
+                if page[2] not in SORT_KEYS:
+                    raise ValueError(f'Unknown sort key {page[2]}')
+        except ValueError as e:
+            self.send_failure(HTTPStatus.BAD_REQUEST, str(e))
+            return
+
+        # parameters that don't apply to the report are left out of the
+        # cache key, so they don't evict other responses
+        if report != 'completion_by_year':
+            fiscal_year = None
+        if report != 'expiration_by_date':
+            expiration = None
+        program_filter = tuple(query.get('program', ())) \
+            if report == 'completion_by_year' else ()
+        if report == 'completion_totals':
+            page = None
+        elif page and report == 'completion_by_year':
+            page = page[:2] + ('name',)
+
+        # the dataset is looked up once, so a reload during the request
+        # doesn't mix two datasets
+        body = self.server.dataset.response(
+            report, fiscal_year, expiration, program_filter, format, page)
+        self.send_body(body, CONTENT_TYPES[format])
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path.strip('/') != 'reload':
+            self.send_failure(HTTPStatus.NOT_FOUND, f'Unknown path {url.path}')
+            return
+
+        force = parse_qs(url.query).get('force', ['0'])[-1] not in ('', '0')
+        try:
+            reloaded = self.server.reload(force)
+        except Exception as e:
+            # the previous dataset keeps serving requests
+            self.send_failure(HTTPStatus.INTERNAL_SERVER_ERROR, str(e))
+            return
+
+        body = json.dumps({
+            'reloaded': reloaded,
+            'employees': len(self.server.dataset.state.employees)
+        }).encode()
+        self.send_body(body, 'application/json')
+
+    def send_failure(self, status, message):
+        self.log_error('%s', message)
+        body = json.dumps({'error': message}).encode()
+        self.send_body(body, 'application/json', status)
+
+    def send_body(self, body, content_type, status=HTTPStatus.OK):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='''
+        Serves the reports of a training records file over HTTP. The file
+        is loaded once, and reloaded with POST /reload when it has changed.
+    ''')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('-i', '--input_file', type=str,
+                        help='Path to the training records JSON file.')
+    source.add_argument('-s', '--state', type=str,
+                        help='Path to a report state file of main.py.')
+    parser.add_argument('--host', type=str, default='127.0.0.1',
+                        help='Host to listen on. Defaults to 127.0.0.1.')
+    parser.add_argument('-p', '--port', type=int, default=8000,
+                        help='Port to listen on. Defaults to 8000.')
+    parser.add_argument('--cache_size', type=int, default=CACHE_SIZE,
+                        help=f'''Number of cached responses. Defaults to
+                        {CACHE_SIZE}.''')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    dataset = ReportDataset(
+        args.state or args.input_file, bool(args.state), args.cache_size)
+    server = ReportServer((args.host, args.port), dataset)
+    print(f'Serving reports on http://{args.host}:{server.server_port}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,261 @@
+import pickle
+from collections import defaultdict
+
+from dates import date_ordinal, fiscal_year
+from timeline import ExpirationTimeline
+import validation
+from validation import TrainingRecord, validate_training_records
+from writer import atomic_open
+
+
+class ReportState:
+    '''
+    Persistable state of all three reports, which can be updated with new
+    or changed training records instead of being rebuilt from the full
+    training records file.
+
+    The state keeps the program totals, the employees who completed each
+    program per fiscal year, and the expiring completions and report entries
+    of each employee. Employees are identified by name. Updating an employee
+    replaces all of their previous training records, and only the report
+    entries of updated employees are recomputed.
+
+    Parameters:
+        fiscal_year (int): default year of report 2 in the format yyyy
+        expiration (str): date string in the format m/d/yyyy
+        expires_in_days (int): time period in which experiation occurs
+        horizons (tuple): time periods in days, sorted and unique, which
+        replace expires_in_days, see expiration.tiered_expired_training
+    '''
+    # states saved before horizons existed
+    horizons = None
+
+    def __init__(self, fiscal_year, expiration, expires_in_days=30,
+                 horizons=None):
+        self.fiscal_year = fiscal_year
+        self.expiration = expiration
+        self.expires_in_days = expires_in_days
+        self.horizons = horizons
+
+        # program name -> number of records with at least one completion
+        self.totals = {}
+        # fiscal year -> program name -> set of employee names
+        self.fiscal_years = {}
+        # employee name -> list of record summaries, see summarize
+        self.employees = {}
+        # employee name -> list of report 3 entries
+        self.expiration_entries = {}
+
+    @staticmethod
+    def summarize(record):
+        '''
+        Extracts everything the reports need from a TrainingRecord checked
+        by validation.validate_record.
+
+        Returns:
+            dict: {
+                'programs': set of completed program names,
+                'fiscal_years': set of (fiscal year, program name),
+                'timeline': ExpirationTimeline of the expiring completions
+            }
+        '''
+        summary = {
+            'programs': set(),
+            'fiscal_years': set()
+        }
+        expirations = []
+        for program, timestamp, expires, label in record.completions:
+            summary['programs'].add(program)
+            if timestamp:
+                summary['fiscal_years'].add((fiscal_year(timestamp), program))
+            if expires:
+                expirations.append((program, expires, label))
+        summary['timeline'] = ExpirationTimeline(expirations)
+        return summary
+
+    def add_record(self, record):
+        '''
+        Adds a training record. Records of employees already in the state
+        are added next to their previous records, see update to replace them.
+
+        Parameters:
+            record (TrainingRecord): training record checked by
+            validation.validate_record. A training record in the form of
+            main.ReportEngine.add_record is validated first.
+        '''
+        if not isinstance(record, TrainingRecord):
+            record, _ = validation.validate_record(record)
+            if record is None:
+                return
+
+        name = record.name
+        summary = self.summarize(record)
+        self.employees.setdefault(name, []).append(summary)
+
+        for program in summary['programs']:
+            self.totals[program] = self.totals.get(program, 0) + 1
+        for year, program in summary['fiscal_years']:
+            self.fiscal_years.setdefault(year, {}).setdefault(
+                program, set()).add(name)
+
+        self._render(name)
+
+    def add_records(self, training_records):
+        for record in training_records:
+            self.add_record(record)
+        return self
+
+    def remove_employee(self, name):
+        '''
+        Removes all training records of an employee.
+
+        Parameters:
+            name (str): employee name
+        '''
+        for summary in self.employees.pop(name, []):
+            for program in summary['programs']:
+                self.totals[program] -= 1
+                if not self.totals[program]:
+                    del self.totals[program]
+            for year, program in summary['fiscal_years']:
+                self.fiscal_years[year][program].discard(name)
+
+        self.expiration_entries.pop(name, None)
+
+    def update(self, training_records):
+        '''
+        Replaces the training records of every employee that appears in the
+        given training records, and adds new employees.
+
+        Parameters:
+            training_records (iterable): new or changed training records
+
+        Returns:
+            set: names of the updated employees
+        '''
+        changed = defaultdict(list)
+        for record in validate_training_records(training_records):
+            changed[record.name].append(record)
+
+        for name, records in changed.items():
+            self.remove_employee(name)
+            self.add_records(records)
+
+        return set(changed)
+
+    def set_expiration(self, expiration, horizons=None):
+        '''
+        Changes the expiration date and time periods of report 3, which
+        recomputes the report entries of all employees from the state.
+
+        Parameters:
+            expiration (str): date string in the format m/d/yyyy
+            horizons (tuple): time periods in days, see ReportState
+        '''
+        if expiration == self.expiration and horizons == self.horizons:
+            return
+        self.expiration = expiration
+        self.horizons = horizons
+        for name in self.employees:
+            self._render(name)
+
+    def _entries(self, name, cutoff):
+        entries = []
+        for summary in self.employees[name]:
+            programs = summary['timeline'].expired_training(
+                cutoff, self.expires_in_days, self.horizons)
+            if programs:
+                entries.append({
+                    'name': name,
+                    'expired_training': programs
+                })
+        return entries
+
+    def _render(self, name):
+        entries = self._entries(name, date_ordinal(self.expiration))
+        if entries:
+            self.expiration_entries[name] = entries
+        else:
+            self.expiration_entries.pop(name, None)
+
+    def completion_totals(self):
+        '''
+        Returns:
+            dict: report 1, see main.count_program_completions
+        '''
+        return {program: self.totals[program] for program in sorted(self.totals)}
+
+    def completion_report_by_year(self, program_filter=None, fiscal_year=None):
+        '''
+        Parameters:
+            program_filter (list): list of training program names, defaults
+            to all training programs
+            fiscal_year (int): year in the format yyyy, defaults to the
+            fiscal year of the state
+
+        Returns:
+            dict: report 2, see main.generate_completion_report_by_year
+        '''
+        completed = self.fiscal_years.get(fiscal_year or self.fiscal_year, {})
+        return {
+            program: sorted(completed.get(program, ()))
+            for program in program_filter or sorted(self.totals)
+        }
+
+    def expiration_report(self, expiration=None):
+        '''
+        Parameters:
+            expiration (str): date string in the format m/d/yyyy, defaults
+            to the expiration date of the state
+
+        Returns:
+            list: report 3, see main.generate_expiration_report_by_date
+        '''
+        return list(self.iter_expiration_report(expiration))
+
+    def iter_expiration_report(self, expiration=None):
+        '''
+        Same as expiration_report, but looks up the entries one employee at a
+        time while they are consumed, e.g. by a report writer.
+
+        Returns:
+            iterator: entries of report 3 sorted by employee name
+        '''
+        if expiration and expiration != self.expiration:
+            # looked up in the timelines without changing the state
+            cutoff = date_ordinal(expiration)
+            for name in sorted(self.employees):
+                yield from self._entries(name, cutoff)
+            return
+
+        for name in sorted(self.expiration_entries):
+            yield from self.expiration_entries[name]
+
+    def save(self, path):
+        '''
+        Writes the state to a file. The file is replaced atomically, so an
+        interrupted run never leaves a partially written state behind.
+
+        Parameters:
+            path (str): path to the state file
+        '''
+        with atomic_open(path, 'wb') as file:
+            pickle.dump(self, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path):
+        '''
+        Reads a state written by save. Only load state files created by
+        this tool, as loading them can execute arbitrary code.
+
+        Parameters:
+            path (str): path to the state file
+
+        Returns:
+            ReportState: the report state
+        '''
+        with open(path, 'rb') as file:
+            state = pickle.load(file)
+        if not isinstance(state, cls):
+            raise ValueError(f'{path} is not a report state file')
+        return state
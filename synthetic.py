@@ -0,0 +1,185 @@
+import argparse
+import json
+import random
+from datetime import date, timedelta
+
+# program names of the bundled trainings.json
+PROGRAMS = [
+    'Animal Care And Use Risk Assessment',
+    'Awareness Training for the Transport of Hazardous Material',
+    'Basic Training Program for Animal Users',
+    'Chemical Waste Requirements',
+    'DOT Hazard Material Awareness',
+    'Electrical Safety for Labs',
+    'Federally Required RCR Training - Must be delivered by PI '
+    '(Not available online)',
+    'Health Screening Questionnaire',
+    'IRB Quiz',
+    'Laboratory Safety Training',
+    'Medical Records',
+    'NIH Guidelines Overview',
+    'OHS Training',
+    'Occupational Exposure to Bloodborne Pathogens',
+    'Physical Science Responsible Conduct of Research Course 1.',
+    'Radiation Safety Annual Refresher',
+    'Radioactive Materials Safety Training',
+    'Retraining in working with the IACUC',
+    'Safe Handling of Human Cell Lines/Materials in a Research Laboratory',
+    'Safety Practices and Procedures to Prevent Zoonotic Diseases While '
+    'Working With Cattle',
+    'Transportation of Infectious Substances, Category B',
+    'Understanding Biosafety',
+    'Using Hazardous Chemicals in an Animal Care Facility',
+    'Working in Cold Temperatures',
+    'X-Ray Safety',
+]
+
+FIRST_NAMES = [
+    'Asia', 'Jaelyn', 'Marcus', 'Elena', 'Kai', 'Priya', 'Diego', 'Hannah',
+    'Omar', 'Lucia', 'Theo', 'Mei', 'Jonah', 'Ava', 'Samir', 'Grace',
+]
+
+LAST_NAMES = [
+    'Duke', 'Quinn', 'Nguyen', 'Garcia', 'Smith', 'Okafor', 'Kowalski',
+    'Patel', 'Rossi', 'Tanaka', 'Schmidt', 'Haddad', 'Brown', 'Silva',
+]
+
+MALFORMED_DATES = ['13/1/2023', '2/30/2023', '1/1/23', 'N/A', '']
+
+
+def format_date(day):
+    return f'{day.month}/{day.day}/{day.year}'
+
+
+def generate_training_records(
+        employees, programs_per_employee=3, repeat_rate=0.1,
+        null_expires_rate=0.67, malformed_rate=0.0, first_year=2021,
+        last_year=2023, seed=0):
+    '''
+    Generates synthetic training records in the shape of trainings.json.
+
+    Parameters:
+        employees (int): number of training records
+        programs_per_employee (float): average number of distinct programs
+        per employee, the actual number is uniformly distributed between
+        0 and twice the average
+        repeat_rate (float): probability that a program was completed again
+        a year later
+        null_expires_rate (float): probability of a completion that can't
+        expire
+        malformed_rate (float): probability of a malformed date
+        first_year (int): first year of completion timestamps
+        last_year (int): last year of completion timestamps
+        seed (int): seed of the random number generator
+
+    Returns:
+        iterator: training records in the form of: {
+            'name': 'employee (string)',
+            'completions': [
+                {
+                    'name': 'training program name (string)',
+                    'timestamp': 'date string in the format m/d/yyyy',
+                    'expires': 'date string in the format m/d/yyyy' | None
+                }
+            ]
+        }
+    '''
+    generator = random.Random(seed)
+    first_day = date(first_year, 1, 1).toordinal()
+    last_day = date(last_year, 12, 31).toordinal()
+    most_programs = min(len(PROGRAMS), round(2 * programs_per_employee))
+
+    def random_date(day):
+        if generator.random() < malformed_rate:
+            return generator.choice(MALFORMED_DATES)
+        return format_date(day)
+
+    for employee in range(employees):
+        name = ' '.join((
+            generator.choice(FIRST_NAMES),
+            generator.choice(LAST_NAMES),
+            str(employee)
+        ))
+
+        completions = []
+        programs = generator.sample(
+            PROGRAMS, generator.randint(0, most_programs))
+        for program in programs:
+            timestamp = date.fromordinal(generator.randint(first_day, last_day))
+            expires = generator.random() >= null_expires_rate
+            while True:
+                completions.append({
+                    'name': program,
+                    'timestamp': random_date(timestamp),
+                    'expires': random_date(timestamp + timedelta(365))
+                    if expires else None
+                })
+                if generator.random() >= repeat_rate:
+                    break
+                timestamp += timedelta(generator.randint(300, 400))
+
+        generator.shuffle(completions)
+        yield {'name': name, 'completions': completions}
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='''
+        Writes synthetic training records in the shape of trainings.json.
+    ''')
+    parser.add_argument('-o', '--output_file', type=str, required=True,
+                        help='Path to the training records JSON file.')
+    parser.add_argument('-n', '--employees', type=int, default=1000,
+                        help='Number of employees.')
+    add_generator_arguments(parser)
+    return parser.parse_args()
+
+
+def add_generator_arguments(parser):
+    parser.add_argument('--programs_per_employee', type=float, default=3,
+                        help='Average number of programs per employee.')
+    parser.add_argument('--repeat_rate', type=float, default=0.1,
+                        help='Probability of a repeated completion.')
+    parser.add_argument('--null_expires_rate', type=float, default=0.67,
+                        help='Probability of a completion that cannot expire.')
+    parser.add_argument('--malformed_rate', type=float, default=0.0,
+                        help='Probability of a malformed date.')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Seed of the random number generator.')
+
+
+def generator_options(args):
+    '''
+    Returns:
+        dict: keyword arguments of generate_training_records
+    '''
+    return {
+        'programs_per_employee': args.programs_per_employee,
+        'repeat_rate': args.repeat_rate,
+        'null_expires_rate': args.null_expires_rate,
+        'malformed_rate': args.malformed_rate,
+        'seed': args.seed
+    }
+
+
+def write_training_records(path, training_records):
+    '''
+    Writes training records as a JSON array, one record at a time.
+    '''
+    with open(path, 'w') as file:
+        file.write('[')
+        for i, record in enumerate(training_records):
+            file.write(',\n' if i else '\n')
+            json.dump(record, file)
+        file.write('\n]\n')
+
+
+def main():
+    args = parse_arguments()
+    write_training_records(
+        args.output_file,
+        generate_training_records(args.employees, **generator_options(args))
+    )
+
+
+if __name__ == '__main__':
+    main()
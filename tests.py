@@ -1,5 +1,16 @@
+import argparse
+import io
+import json
+import os
+import sqlite3
+import tempfile
+import threading
 import unittest
+import urllib.error
+import urllib.request
+from array import array
 from datetime import datetime
+from unittest import mock
 from main import (
     aggregate_training_programs,
     has_completed_training_program,
@@ -9,7 +20,41 @@ from main import (
     generate_completion_report_by_year,
     index_expired_programs,
     index_expiring_programs,
-    generate_expiration_report_by_date
+    index_program_expirations,
+    generate_expiration_report_by_date,
+    ReportEngine,
+    build_reports_in_parallel,
+    parse_fiscal_years,
+    parse_expirations,
+    parse_horizons
+)
+from index import FiscalYearIndex, ProgramIndex
+import dates
+import ingest
+from ingest import read_training_records
+from columnar import CompletionStore, NULL_DATE
+import vectorized
+from state import ReportState
+from timeline import ExpirationTimeline
+from expiration import expired_training, tiered_expired_training
+import cache
+import sections
+from synthetic import generate_training_records
+from profiling import Profiler
+import writer
+import server
+from database import TrainingDatabase
+from mapped import MappedIndex, compile_index
+from queries import completion_page, expiration_page
+from diff import Snapshot, diff_snapshots
+from lookup import EmployeeIndex
+import main
+import validation
+from validation import (
+    Completion,
+    TrainingRecord,
+    validate_record,
+    validate_training_records
 )
 
 
@@ -57,6 +102,13 @@ class TestCountProgramCompletions(unittest.TestCase):
         )
         self.assertEqual(result, {'A': 3, 'B': 1, 'C': 2})
 
+    def test_no_dates_parsed(self):
+        fail = mock.Mock(side_effect=AssertionError('date parsed'))
+        with mock.patch.object(validation, 'parse_date', fail):
+            result = count_program_completions(
+                ['A', 'C'], TestReportEngine.training_records)
+        self.assertEqual(result, {'A': 3, 'C': 1})
+
 
 class TestDateFromString(unittest.TestCase):
     def test_valid_date(self):
@@ -64,6 +116,16 @@ class TestDateFromString(unittest.TestCase):
 
     def test_invalid_date(self):
         self.assertEqual(date_from_string('13/1/2024'), None)
+        self.assertEqual(date_from_string('2/29/2023'), None)
+        self.assertEqual(date_from_string('1/1/24'), None)
+        self.assertEqual(date_from_string(None), None)
+
+    def test_cache_statistics(self):
+        dates.cache_clear()
+        date_from_string('2/29/2024')
+        date_from_string('2/29/2024')
+        info = dates.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
 
 
 class TestIsWithinFiscalYear(unittest.TestCase):
@@ -120,6 +182,83 @@ class TestGenerateCompletionReportByYear(unittest.TestCase):
         })
 
 
+class TestProgramIndex(unittest.TestCase):
+    training_records = TestGenerateCompletionReportByYear.training_records
+
+    def test_count_programs(self):
+        index = ProgramIndex(self.training_records)
+        self.assertEqual(
+            count_program_completions(['A', 'B', 'C', 'X'], index),
+            {'A': 4, 'B': 2, 'C': 3, 'X': 0}
+        )
+
+    def test_generate_completion_report_by_year(self):
+        index = ProgramIndex(self.training_records)
+        self.assertEqual(
+            generate_completion_report_by_year(index, 2024, ['A', 'B', 'C']),
+            {
+                'A': ['Jack', 'Jane', 'Jim'],
+                'B': ['Jack'],
+                'C': ['Jane', 'John'],
+            }
+        )
+
+    def test_add_record(self):
+        index = ProgramIndex(self.training_records)
+        index.add_record({'name': 'Joe', 'completions': [
+            {'name': 'G', 'timestamp': '1/1/2024'},
+            {'name': 'G', 'timestamp': '1/1/2022'}
+        ]})
+        self.assertEqual(aggregate_training_programs(index)[-1], 'G')
+        self.assertEqual(index.count('G'), 1)
+        self.assertEqual(len(index.employees('G')['Joe']), 2)
+
+
+class TestFiscalYearIndex(unittest.TestCase):
+    training_records = TestGenerateCompletionReportByYear.training_records
+
+    def test_completion_report_by_year(self):
+        index = FiscalYearIndex(self.training_records)
+        for fiscal_year in (None, 2023, 2024, 2025):
+            for program_filter in (['A', 'C'], ['B', 'Z']):
+                self.assertEqual(
+                    index.completion_report_by_year(
+                        fiscal_year, program_filter),
+                    generate_completion_report_by_year(
+                        ProgramIndex(self.training_records),
+                        fiscal_year, program_filter)
+                )
+
+    def test_fiscal_year_boundaries(self):
+        index = FiscalYearIndex([
+            {'name': 'Jim', 'completions': [
+                {'name': 'A', 'timestamp': '6/30/2023'},
+                {'name': 'A', 'timestamp': '7/1/2023'},
+                {'name': 'A', 'timestamp': 'invalid'},
+            ]},
+            {'name': 'Ann', 'completions': [
+                {'name': 'A', 'timestamp': '7/1/2024'},
+            ]},
+        ])
+        self.assertEqual(index.fiscal_years(), [2023, 2024, 2025])
+        self.assertEqual(index.employees(2023, 'A'), ['Jim'])
+        self.assertEqual(index.employees(2024, 'A'), ['Jim'])
+
+        index.add_record({'name': 'Bob', 'completions': [
+            {'name': 'A', 'timestamp': '1/1/2024'}]})
+        self.assertEqual(index.employees(2024, 'A'), ['Bob', 'Jim'])
+
+    def test_range(self):
+        index = FiscalYearIndex(self.training_records)
+        report = index.completion_report_by_year(2023, ['A', 'B'], 2025)
+        for program in ('A', 'B'):
+            self.assertEqual(report[program], sorted(set(
+                employee
+                for year in (2023, 2024, 2025)
+                for employee in index.employees(year, program)
+            )))
+
+
 class TestIndexExpiredPrograms(unittest.TestCase):
     completions = [
         {'name': 'A', 'expires': '1/1/2024'},
@@ -159,6 +298,31 @@ class TestIndexExpiredPrograms(unittest.TestCase):
             'F': '11/1/2024'
         })
 
+    def test_program_expirations(self):
+        expirations = index_program_expirations(
+            self.completions + [{'name': 'G', 'expires': None}])
+        self.assertIsInstance(expirations, ExpirationTimeline)
+        self.assertNotIn('G', expirations.programs)
+        self.assertEqual(expirations.most_recent['B'], (
+            datetime(2024, 10, 11).toordinal(), 3, '10/11/2024'))
+
+        # the same expirations are looked up for several dates
+        for expiration_date in (
+            datetime(2024, 1, 1), datetime(2024, 10, 10), datetime(2025, 1, 1)
+        ):
+            self.assertEqual(
+                index_expired_programs(expirations, expiration_date),
+                index_expired_programs(self.completions, expiration_date)
+            )
+            self.assertEqual(
+                index_expiring_programs(expirations, expiration_date, 30),
+                index_expiring_programs(self.completions, expiration_date, 30)
+            )
+        self.assertEqual(
+            list(index_expired_programs(expirations, datetime(2025, 1, 1))),
+            ['A', 'D', 'B', 'C', 'F']
+        )
+
 
 class TestGenerateExpirationReportByDate(unittest.TestCase):
     training_records = [
@@ -219,5 +383,1101 @@ class TestGenerateExpirationReportByDate(unittest.TestCase):
         ])
 
 
+class TestReportEngine(unittest.TestCase):
+    training_records = [
+        {'name': 'Jim', 'completions': [
+            {'name': 'A', 'timestamp': '1/1/2024', 'expires': '1/1/2024'},
+            {'name': 'B', 'timestamp': '7/1/2023', 'expires': '7/1/2024'},
+            {'name': 'C', 'timestamp': '6/30/2023', 'expires': '10/1/2024'}
+        ]},
+        {'name': 'Jack', 'completions': [
+            {'name': 'D', 'timestamp': '1/1/2024', 'expires': None}
+        ]},
+        {'name': 'John', 'completions': [
+            {'name': 'A', 'timestamp': '9/30/2023', 'expires': '9/30/2024'},
+            {'name': 'A', 'timestamp': '1/30/2023', 'expires': '1/30/2024'},
+            {'name': 'A', 'timestamp': '9/30/2022', 'expires': '9/30/2023'}
+        ]},
+        {'name': 'Jill', 'completions': []},
+        {'name': 'Jane', 'completions': [
+            {'name': 'F', 'timestamp': '10/10/2023', 'expires': '10/10/2024'},
+            {'name': 'F', 'timestamp': '8/10/2023', 'expires': '8/10/2024'},
+            {'name': 'A', 'timestamp': '5/10/2023', 'expires': '5/10/2024'}
+        ]}
+    ]
+
+    def setUp(self):
+        self.engine = ReportEngine(2024, '10/1/2024').add_records(
+            self.training_records)
+
+    def test_completion_totals(self):
+        training_programs = aggregate_training_programs(self.training_records)
+        self.assertEqual(
+            self.engine.completion_totals(),
+            count_program_completions(training_programs, self.training_records)
+        )
+
+    def test_completion_report_by_year(self):
+        self.assertEqual(
+            self.engine.completion_report_by_year(['A', 'C', 'X']),
+            generate_completion_report_by_year(
+                self.training_records, 2024, ['A', 'C', 'X'])
+        )
+
+    def test_expiration_report(self):
+        self.assertEqual(
+            self.engine.expiration_report(),
+            generate_expiration_report_by_date(
+                self.training_records, '10/1/2024')
+        )
+
+    def test_build_reports_in_parallel(self):
+        engine = build_reports_in_parallel(
+            self.training_records, 2, 2024, '10/1/2024', shard_size=2)
+        self.assertEqual(
+            engine.completion_totals(), self.engine.completion_totals())
+        self.assertEqual(
+            engine.completion_report_by_year(),
+            self.engine.completion_report_by_year())
+        self.assertEqual(
+            engine.expiration_report(), self.engine.expiration_report())
+
+    def test_selected_reports(self):
+        # report 1 doesn't need any dates
+        fail = mock.Mock(side_effect=AssertionError('date parsed'))
+        with mock.patch.object(validation, 'parse_date', fail):
+            engine = ReportEngine(
+                2024, '10/1/2024', reports=('totals',)
+            ).add_records(self.training_records)
+        self.assertEqual(
+            engine.completion_totals(), self.engine.completion_totals())
+        self.assertEqual(engine.expiration_report(), [])
+
+        engine = ReportEngine(
+            2024, '10/1/2024', reports=('expiration',)
+        ).add_records(self.training_records)
+        self.assertEqual(
+            engine.expiration_report(), self.engine.expiration_report())
+        self.assertEqual(engine.completed_in_fiscal_year, {})
+
+    def test_selected_reports_validated(self):
+        # the records are validated with the dates of the selected reports
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'trainings.json')
+            with open(path, 'w') as file:
+                json.dump(self.training_records, file)
+
+            for workers in ('1', '2'):
+                with mock.patch('sys.argv', [
+                        'main.py', '-i', path, '-r', 'totals', '-w', workers]):
+                    args = main.parse_arguments()
+                fail = mock.Mock(side_effect=AssertionError('date parsed'))
+                with mock.patch.object(validation, 'parse_date', fail):
+                    totals, by_year, by_date = main.build_reports(
+                        args, [2024], ['10/1/2024'])
+                self.assertEqual(totals, self.engine.completion_totals())
+                self.assertEqual((by_year, by_date), ({}, {}))
+
+            with mock.patch('sys.argv', [
+                    'main.py', '-i', path, '-r', 'expiration']):
+                args = main.parse_arguments()
+            with mock.patch.object(
+                    validation, 'parse_date', wraps=dates.parse_date) as parse:
+                _, by_year, by_date = main.build_reports(
+                    args, [2024], ['10/1/2024'])
+            self.assertEqual(
+                by_date, {'10/1/2024': self.engine.expiration_report()})
+            self.assertEqual(by_year, {})
+            # expiration dates only
+            self.assertEqual(
+                [call.args[0] for call in parse.call_args_list],
+                [completion['expires'] for record in self.training_records
+                 for completion in record['completions']]
+            )
+
+
+class TestCompletionStore(unittest.TestCase):
+    training_records = TestReportEngine.training_records
+
+    def setUp(self):
+        self.store = CompletionStore(self.training_records)
+
+    def test_columns(self):
+        self.assertEqual(len(self.store), 5)
+        self.assertEqual(len(self.store.program), 10)
+        self.assertEqual(self.store.programs, ['A', 'B', 'C', 'D', 'F'])
+        self.assertEqual(self.store.expires[3], NULL_DATE)
+
+    def test_malformed_records(self):
+        # the rows quarantined by validation are left out of the store
+        training_records = TestTrainingDatabase.training_records
+        store = CompletionStore(training_records)
+        programs = aggregate_training_programs(training_records)
+        self.assertEqual(aggregate_training_programs(store), programs)
+        self.assertEqual(
+            count_program_completions(programs, store),
+            count_program_completions(programs, training_records))
+        for expiration in ('1/1/2024', '10/1/2024'):
+            self.assertEqual(
+                generate_expiration_report_by_date(store, expiration),
+                generate_expiration_report_by_date(
+                    training_records, expiration))
+
+    def test_completion_totals(self):
+        self.assertEqual(
+            count_program_completions(
+                aggregate_training_programs(self.store), self.store),
+            self.engine_reports().completion_totals()
+        )
+
+    def test_completion_report_by_year(self):
+        self.assertEqual(
+            generate_completion_report_by_year(self.store, 2024, ['A', 'X']),
+            self.engine_reports().completion_report_by_year(['A', 'X'])
+        )
+
+    def test_expiration_report(self):
+        self.assertEqual(
+            generate_expiration_report_by_date(self.store, '10/1/2024'),
+            self.engine_reports().expiration_report()
+        )
+
+    def engine_reports(self):
+        return ReportEngine(2024, '10/1/2024').add_records(
+            self.training_records)
+
+
+class TestVectorizedExpirationReport(unittest.TestCase):
+    def setUp(self):
+        with open('trainings.json', 'r') as file:
+            self.store = CompletionStore(json.load(file))
+        with open('expiration_by_date.json', 'r') as file:
+            self.expected = json.load(file)
+
+    @unittest.skipIf(vectorized.np is None, 'NumPy is not installed')
+    def test_vectorized(self):
+        result = vectorized.expiration_report(self.store, '10/1/2023')
+        self.assertEqual(json.dumps(result), json.dumps(self.expected))
+
+    def test_fallback(self):
+        with mock.patch.object(vectorized, 'np', None):
+            result = vectorized.expiration_report(self.store, '10/1/2023')
+        self.assertEqual(json.dumps(result), json.dumps(self.expected))
+
+    def test_empty_store(self):
+        result = vectorized.expiration_report(CompletionStore(), '10/1/2023')
+        self.assertEqual(result, [])
+
+
+class TestReportState(unittest.TestCase):
+    training_records = TestReportEngine.training_records
+
+    def assertSameReports(self, state, training_records):
+        engine = ReportEngine(2024, '10/1/2024').add_records(training_records)
+        self.assertEqual(state.completion_totals(), engine.completion_totals())
+        self.assertEqual(
+            state.completion_report_by_year(),
+            engine.completion_report_by_year())
+        self.assertEqual(state.expiration_report(), engine.expiration_report())
+
+    def test_build(self):
+        state = ReportState(2024, '10/1/2024').add_records(
+            self.training_records)
+        self.assertSameReports(state, self.training_records)
+
+    def test_update(self):
+        state = ReportState(2024, '1/1/2020').add_records(
+            self.training_records[:3])
+        state.set_expiration('10/1/2024')
+        updated = state.update([
+            {'name': 'John', 'completions': []},
+            *self.training_records[2:]
+        ])
+        self.assertEqual(updated, {'John', 'Jill', 'Jane'})
+        self.assertSameReports(state, self.training_records)
+
+    def test_expiration_report_by_date(self):
+        state = ReportState(2024, '10/1/2024').add_records(
+            self.training_records)
+        for expiration in ('1/1/2024', '9/1/2024', '1/1/2025'):
+            self.assertEqual(
+                state.expiration_report(expiration),
+                generate_expiration_report_by_date(
+                    self.training_records, expiration)
+            )
+
+    def test_save_and_load(self):
+        state = ReportState(2024, '10/1/2024').add_records(
+            self.training_records)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'state')
+            state.save(path)
+            self.assertSameReports(
+                ReportState.load(path), self.training_records)
+
+
+class TestCache(unittest.TestCase):
+    training_records = TestReportEngine.training_records
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.input_file = os.path.join(self.directory.name, 'trainings.json')
+        self.cache_directory = os.path.join(self.directory.name, 'cache')
+        with open(self.input_file, 'w') as file:
+            json.dump(self.training_records, file)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_cached_store(self):
+        store = cache.load_store(self.input_file, self.cache_directory)
+        self.assertIsInstance(store.program, array)
+        cached = cache.load_store(self.input_file, self.cache_directory)
+        self.assertIsInstance(cached.program, memoryview)
+        self.assertEqual(
+            generate_expiration_report_by_date(cached, '10/1/2024'),
+            generate_expiration_report_by_date(store, '10/1/2024'))
+        self.assertEqual(
+            generate_completion_report_by_year(cached, 2024, ['A', 'F']),
+            generate_completion_report_by_year(store, 2024, ['A', 'F']))
+
+    def test_stale_cache(self):
+        cache.load_store(self.input_file, self.cache_directory)
+        with open(self.input_file, 'w') as file:
+            json.dump(self.training_records[:1], file)
+        store = cache.load_store(self.input_file, self.cache_directory)
+        self.assertEqual(len(store), 1)
+
+    def test_touched_file(self):
+        cache.load_store(self.input_file, self.cache_directory)
+        os.utime(self.input_file, ns=(0, 0))
+        with mock.patch.object(
+                cache, 'file_hash', wraps=cache.file_hash) as file_hash:
+            for _ in range(3):
+                store = cache.load_store(self.input_file, self.cache_directory)
+                self.assertIsInstance(store.program, memoryview)
+        # hashed once, then the cache has the new fingerprint
+        self.assertEqual(file_hash.call_count, 1)
+
+
+class TestSections(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'sections')
+
+    def test_round_trip(self):
+        sections.write_sections(self.path, b'TESTFILE', 1, {'key': 'value'}, [
+            ('bytes', 'B', array('B', b'abc')),
+            ('empty', 'q', array('q')),
+            ('numbers', 'q', array('q', [1, -2, 3])),
+        ])
+        header, data = sections.read_sections(
+            self.path, b'TESTFILE', 1, 'test')
+        self.assertEqual(header['key'], 'value')
+        self.assertEqual(bytes(data['bytes']), b'abc')
+        self.assertEqual(data['empty'].tolist(), [])
+        self.assertEqual(data['numbers'].tolist(), [1, -2, 3])
+        self.assertEqual(os.path.getsize(self.path) % 8, 0)
+
+    def test_incompatible_files(self):
+        sections.write_sections(self.path, b'TESTFILE', 1, {}, [
+            ('numbers', 'q', array('q', range(10)))])
+        for magic, version in ((b'TESTFILE', 2), (b'OTHERFIL', 1)):
+            with self.assertRaisesRegex(ValueError, 'not a compatible'):
+                sections.read_sections(self.path, magic, version, 'test')
+
+        with open(self.path, 'r+b') as file:
+            file.truncate(os.path.getsize(self.path) - 8)
+        with self.assertRaisesRegex(ValueError, 'truncated'):
+            sections.read_sections(self.path, b'TESTFILE', 1, 'test')
+
+
+class TestExpirationTimeline(unittest.TestCase):
+    completions = [
+        ('A', 10, '10'), ('B', 40, '40'), ('A', 30, '30'), ('B', 20, '20'),
+        ('A', 30, '30 again'), ('C', 25, '25'), ('B', 25, '25'),
+    ]
+
+    def test_expired_training(self):
+        timeline = ExpirationTimeline(self.completions)
+        for cutoff in range(5, 50, 5):
+            self.assertEqual(
+                timeline.expired_training(cutoff, 10),
+                expired_training(self.completions, cutoff, 10)
+            )
+
+    def test_no_completions(self):
+        self.assertEqual(ExpirationTimeline([]).expired_training(10), [])
+
+    def test_horizons(self):
+        timeline = ExpirationTimeline(self.completions)
+        for cutoff in range(5, 50, 5):
+            self.assertEqual(
+                timeline.expired_training(cutoff, horizons=(0, 5, 15)),
+                tiered_expired_training(self.completions, cutoff, (0, 5, 15))
+            )
+
+        self.assertEqual(
+            tiered_expired_training(self.completions, 20, (3, 7, 20)),
+            [
+                {'name': 'B', 'expiration': '20', 'status': 'expires soon',
+                 'expires_in_days': 3},
+                {'name': 'C', 'expiration': '25', 'status': 'expires soon',
+                 'expires_in_days': 7},
+                {'name': 'A', 'expiration': '30 again',
+                 'status': 'expires soon', 'expires_in_days': 20}
+            ]
+        )
+
+        # a single time period lists the same programs as expired_training
+        for cutoff in range(5, 50, 5):
+            self.assertEqual(
+                [
+                    {key: value for key, value in program.items()
+                     if key != 'expires_in_days'}
+                    for program in tiered_expired_training(
+                        self.completions, cutoff, (10,))
+                ],
+                expired_training(self.completions, cutoff, 10)
+            )
+
+
+class TestParseArguments(unittest.TestCase):
+    def test_fiscal_years(self):
+        self.assertEqual(parse_fiscal_years('2024'), [2024])
+        self.assertEqual(
+            parse_fiscal_years('2019-2021,2024,2020'), [2019, 2020, 2021, 2024])
+
+    def test_expirations(self):
+        self.assertEqual(parse_expirations('10/1/2023'), ['10/1/2023'])
+        self.assertEqual(
+            parse_expirations('1/31/2024-4/30/2024,1/15/2023-3/1/2023'),
+            ['1/31/2024', '2/29/2024', '3/31/2024', '4/30/2024',
+             '1/15/2023', '2/15/2023']
+        )
+
+    def test_invalid_expiration(self):
+        with self.assertRaises(argparse.ArgumentTypeError):
+            parse_expirations('13/1/2024')
+
+    def test_invalid_ranges(self):
+        for value in ('2026-2019', '2024-', '2019-2021,2024-', '-2024'):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                parse_fiscal_years(value)
+        for value in ('4/30/2024-1/31/2024', '1/1/2024-', '1/1/2024- '):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                parse_expirations(value)
+        self.assertEqual(parse_fiscal_years('2024-2024'), [2024])
+        self.assertEqual(
+            parse_expirations('1/31/2024-1/31/2024'), ['1/31/2024'])
+
+    def test_horizons(self):
+        self.assertEqual(parse_horizons('90,7,30,7'), (7, 30, 90))
+        with self.assertRaises(argparse.ArgumentTypeError):
+            parse_horizons('7,thirty')
+
+
+class TestGenerateTrainingRecords(unittest.TestCase):
+    def test_shape(self):
+        training_records = list(generate_training_records(
+            100, null_expires_rate=0, malformed_rate=0))
+        self.assertEqual(len(training_records), 100)
+        for record in training_records:
+            for completion in record['completions']:
+                self.assertIsNotNone(date_from_string(completion['timestamp']))
+                self.assertIsNotNone(date_from_string(completion['expires']))
+
+    def test_seed(self):
+        self.assertEqual(
+            list(generate_training_records(10, seed=1)),
+            list(generate_training_records(10, seed=1))
+        )
+
+    def test_malformed_dates(self):
+        training_records = list(generate_training_records(
+            100, null_expires_rate=0, malformed_rate=0.5))
+        engine = ReportEngine(2024, '10/1/2023').add_records(training_records)
+        self.assertEqual(
+            engine.expiration_report(),
+            generate_expiration_report_by_date(training_records, '10/1/2023')
+        )
+
+
+class TestReadTrainingRecords(unittest.TestCase):
+    training_records = TestReportEngine.training_records
+
+    def test_json_array(self):
+        file = io.StringIO(json.dumps(self.training_records, indent=4))
+        result = list(read_training_records(file, chunk_size=16))
+        self.assertEqual(result, self.training_records)
+
+    def test_json_lines(self):
+        file = io.StringIO(
+            '\n'.join(json.dumps(record) for record in self.training_records))
+        result = list(read_training_records(file, chunk_size=16))
+        self.assertEqual(result, self.training_records)
+
+    def test_invalid_json(self):
+        file = io.StringIO('[{"name": "Jim"} {"name": "Jack"}]')
+        with self.assertRaises(json.JSONDecodeError):
+            list(read_training_records(file))
+
+    def test_report_from_iterator(self):
+        file = io.StringIO(json.dumps(self.training_records))
+        self.assertEqual(
+            generate_expiration_report_by_date(
+                read_training_records(file), '10/1/2024'),
+            generate_expiration_report_by_date(
+                self.training_records, '10/1/2024')
+        )
+
+
+class TestReadTrainingFiles(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, training_records):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w') as file:
+            json.dump(training_records, file)
+        return path
+
+    def test_merge_employees(self):
+        self.write('a.json', [
+            {'name': 'Jim', 'completions': [
+                {'name': 'A', 'timestamp': '1/1/2024', 'expires': None}]},
+            {'name': 'Ann', 'completions': []},
+        ])
+        self.write('b.json', [
+            {'name': 'Jim', 'completions': [
+                {'name': 'B', 'timestamp': '1/1/2024', 'expires': None},
+                {'name': 'A', 'timestamp': '1/1/2024', 'expires': None}]},
+        ])
+        paths = ingest.expand_paths(
+            [os.path.join(self.directory.name, '*.json')])
+        self.assertEqual([os.path.basename(path) for path in paths],
+                         ['a.json', 'b.json'])
+
+        self.assertEqual(ingest.read_training_files(paths), [
+            {'name': 'Jim', 'completions': [
+                {'name': 'A', 'timestamp': '1/1/2024', 'expires': None},
+                {'name': 'B', 'timestamp': '1/1/2024', 'expires': None}]},
+            {'name': 'Ann', 'completions': []},
+        ])
+
+    def test_split_files(self):
+        training_records = TestReportEngine.training_records
+        paths = [
+            self.write(f'{i}.json', training_records[i::3]) for i in range(3)
+        ]
+        merged = ingest.read_training_files(paths)
+        self.assertEqual(
+            generate_expiration_report_by_date(merged, '10/1/2024'),
+            generate_expiration_report_by_date(training_records, '10/1/2024')
+        )
+
+    def test_malformed_records(self):
+        # left unmerged and quarantined by validation
+        paths = [
+            self.write('a.json', [
+                {'completions': []},
+                {'name': 'Jim', 'completions': []}]),
+            self.write('b.json', [
+                'Jim', {'name': 'Jim', 'completions': {}}]),
+        ]
+        merged = ingest.read_training_files(paths)
+        self.assertEqual(merged, [
+            {'completions': []},
+            {'name': 'Jim', 'completions': []},
+            'Jim',
+            {'name': 'Jim', 'completions': {}}
+        ])
+
+        quarantine = io.StringIO()
+        records = list(validate_training_records(merged, quarantine))
+        self.assertEqual(records, [TrainingRecord('Jim', ())])
+        self.assertEqual(len(quarantine.getvalue().splitlines()), 3)
+
+    def test_missing_files(self):
+        with self.assertRaises(FileNotFoundError):
+            ingest.expand_paths([os.path.join(self.directory.name, '*.json')])
+
+
+class TestProfiler(unittest.TestCase):
+    def test_instrument(self):
+        original = main.date_ordinal
+        profiler = Profiler().start()
+        main.instrument(profiler)
+        with profiler.phase('reports'):
+            ReportEngine(2024, '10/1/2023').add_records(
+                TestReportEngine.training_records)
+        profiler.stop()
+
+        self.assertIs(main.date_ordinal, original)
+        self.assertIs(validation.parse_date, dates.parse_date)
+        report = {row['name']: row for row in profiler.report()}
+        self.assertEqual(report['reports']['kind'], 'phase')
+        self.assertEqual(report['reports']['calls'], 1)
+        self.assertEqual(
+            report['ReportEngine.add_record']['calls'],
+            len(TestReportEngine.training_records)
+        )
+        # completion and expiration date of every completion
+        self.assertEqual(report['parse_date']['calls'], 20)
+        self.assertGreater(report['reports']['peak_memory'], 0)
+
+    def test_nested_measurements(self):
+        profiler = Profiler().start()
+        with profiler.phase('outer'):
+            with profiler.measure('inner', 'function'):
+                data = [0] * 100000
+            del data
+        profiler.stop()
+
+        report = {row['name']: row for row in profiler.report()}
+        self.assertGreaterEqual(
+            report['outer']['peak_memory'], report['inner']['peak_memory'])
+        self.assertGreater(report['inner']['peak_memory'], 100000)
+
+
+class TestWriteReport(unittest.TestCase):
+    reports = [
+        {},
+        [],
+        {'Electrical Safety for Labs': 2, 'X-Ray Safety': 0},
+        {'X-Ray Safety': ['Jim Henson', 'Jack Black'], 'IRB Quiz': []},
+        generate_expiration_report_by_date(
+            TestReportEngine.training_records, '10/1/2024'),
+    ]
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'report.json')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read(self):
+        with open(self.path) as file:
+            return file.read()
+
+    def test_pretty(self):
+        for report in self.reports:
+            writer.write_report(self.path, report)
+            self.assertEqual(
+                self.read(), json.dumps(report, indent=4, default=str))
+
+    def test_compact(self):
+        for report in self.reports:
+            writer.write_report(self.path, iter(report)
+                                if isinstance(report, list) else report,
+                                'compact')
+            self.assertEqual(json.loads(self.read()), report)
+            self.assertNotIn('\n', self.read())
+
+    def test_json_lines(self):
+        report = self.reports[-1]
+        writer.write_report(self.path, report, 'jsonl')
+        lines = self.read().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], report)
+
+    def test_failed_write_keeps_previous_report(self):
+        writer.write_report(self.path, ['previous'])
+
+        def entries():
+            yield 'next'
+            raise RuntimeError('failed')
+
+        with self.assertRaises(RuntimeError):
+            writer.write_report(self.path, entries())
+        self.assertEqual(json.loads(self.read()), ['previous'])
+        self.assertEqual(os.listdir(self.directory.name), ['report.json'])
+
+    def test_concurrent_writes(self):
+        # every writer has its own temporary file
+        errors = []
+
+        def write(i):
+            try:
+                for _ in range(20):
+                    writer.write_report(self.path, [i] * 1000, 'compact')
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=write, args=(i,)) for i in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(set(json.loads(self.read()))), 1)
+        self.assertEqual(os.listdir(self.directory.name), ['report.json'])
+
+        # the same permissions as a file created with open
+        created = os.path.join(self.directory.name, 'created')
+        open(created, 'w').close()
+        self.assertEqual(
+            os.stat(self.path).st_mode & 0o777,
+            os.stat(created).st_mode & 0o777)
+
+
+class TestTrainingDatabase(unittest.TestCase):
+    training_records = TestReportEngine.training_records + [
+        {'name': 'Jim', 'completions': [
+            {'name': 'A', 'timestamp': '1/1/2023', 'expires': '01/01/2024'},
+            {'name': '', 'timestamp': '1/1/2023', 'expires': '1/1/2024'},
+            {'timestamp': 'invalid', 'expires': 'invalid'},
+            'B',
+        ]},
+        {'name': 'Ann'},
+        {'completions': [{'name': 'A', 'timestamp': '1/1/2024'}]},
+        'Joe',
+    ]
+
+    def assert_reports(self, database):
+        programs = aggregate_training_programs(self.training_records)
+        self.assertEqual(aggregate_training_programs(database), programs)
+        self.assertEqual(
+            count_program_completions(programs + ['Z'], database),
+            count_program_completions(programs + ['Z'], self.training_records)
+        )
+        for fiscal_year in (None, 2023, 2024):
+            self.assertEqual(
+                generate_completion_report_by_year(
+                    database, fiscal_year, programs + ['Z']),
+                generate_completion_report_by_year(
+                    self.training_records, fiscal_year, programs + ['Z'])
+            )
+        for expiration in ('1/1/2024', '10/1/2023', '10/1/2024'):
+            self.assertEqual(
+                generate_expiration_report_by_date(database, expiration),
+                generate_expiration_report_by_date(
+                    self.training_records, expiration)
+            )
+
+    def test_reports(self):
+        with TrainingDatabase() as database:
+            self.assert_reports(database.add_records(self.training_records))
+
+    def test_reopen(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'trainings.db')
+            with TrainingDatabase(path) as database:
+                database.add_records(self.training_records[:3])
+                database.add_records(self.training_records[3:])
+            with TrainingDatabase(path, create=False) as database:
+                self.assert_reports(database)
+
+            with self.assertRaises(sqlite3.OperationalError):
+                TrainingDatabase(os.path.join(directory, 'missing.db'),
+                                 create=False)
+
+
+class TestMappedIndex(unittest.TestCase):
+    training_records = TestTrainingDatabase.training_records
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'trainings.idx')
+        compile_index(self.training_records, self.path)
+
+    def test_reports(self):
+        # completions without a program name are left out when compiling
+        index = MappedIndex(self.path)
+        programs = aggregate_training_programs(self.training_records)
+        self.assertEqual(aggregate_training_programs(index), programs)
+        self.assertEqual(
+            count_program_completions(programs + ['Z'], index),
+            count_program_completions(programs + ['Z'], self.training_records)
+        )
+        for fiscal_year in (None, 2023, 2024):
+            self.assertEqual(
+                generate_completion_report_by_year(
+                    index, fiscal_year, programs + ['Z']),
+                generate_completion_report_by_year(
+                    self.training_records, fiscal_year, programs + ['Z'])
+            )
+        for expiration in ('1/1/2024', '10/1/2023', '10/1/2024'):
+            self.assertEqual(
+                generate_expiration_report_by_date(index, expiration),
+                generate_expiration_report_by_date(
+                    self.training_records, expiration)
+            )
+
+    def test_sorted_rows(self):
+        index = MappedIndex(self.path)
+        self.assertEqual(index.programs, ['A', 'B', 'C', 'D', 'F'])
+        rows = [
+            tuple(index.rows[i:i + 5]) for i in range(0, len(index.rows), 5)
+        ]
+        self.assertEqual(rows, sorted(rows))
+        self.assertEqual(
+            [index.employee(record) for record in range(len(index))],
+            ['Jim', 'Jack', 'John', 'Jill', 'Jane', 'Jim', 'Ann']
+        )
+
+    def test_invalid_file(self):
+        with open(self.path, 'r+b') as file:
+            file.write(b'RINNOTRN')
+        with self.assertRaises(ValueError):
+            MappedIndex(self.path)
+
+
+class TestQueries(unittest.TestCase):
+    training_records = TestReportEngine.training_records + [
+        {'name': 'Amy', 'completions': [
+            {'name': 'A', 'timestamp': '1/1/2020', 'expires': '1/1/2021'},
+            {'name': 'B', 'timestamp': '1/1/2020', 'expires': '1/1/2022'}
+        ]},
+        {'name': 'Bob', 'completions': [
+            {'name': 'A', 'timestamp': '9/1/2023', 'expires': '1/1/2020'}
+        ]}
+    ]
+
+    def test_expiration_page(self):
+        report = generate_expiration_report_by_date(
+            self.training_records, '10/1/2024')
+        state = ReportState(2024, '10/1/2024').add_records(
+            self.training_records)
+        for source in (self.training_records, state):
+            for offset, limit in ((0, 2), (1, 3), (4, 10), (10, 1)):
+                self.assertEqual(
+                    expiration_page(source, '10/1/2024', limit, offset),
+                    report[offset:offset + limit]
+                )
+
+            self.assertEqual(
+                [entry['name'] for entry in expiration_page(
+                    source, '10/1/2024', 3, sort='oldest_expiration')],
+                ['Bob', 'Amy', 'Jim']
+            )
+            self.assertEqual(
+                [entry['name'] for entry in expiration_page(
+                    source, '10/1/2024', 3, sort='expired_programs')],
+                ['Amy', 'Jim', 'Bob']
+            )
+
+        with self.assertRaises(ValueError):
+            expiration_page(self.training_records, '10/1/2024', 3, sort='age')
+
+    def test_completion_page(self):
+        employees = generate_completion_report_by_year(
+            self.training_records, 2024, ['A'])['A']
+        for source in (
+            self.training_records,
+            FiscalYearIndex(self.training_records),
+            ReportState(2024, '10/1/2024').add_records(self.training_records)
+        ):
+            self.assertEqual(
+                completion_page(source, 2024, 'A', 2, 1), employees[1:3])
+            self.assertEqual(completion_page(source, 2024, 'Z', 2), [])
+
+
+class TestDiff(unittest.TestCase):
+    old_records = TestReportEngine.training_records
+    new_records = [
+        {'name': 'Jim', 'completions': [
+            {'name': 'A', 'timestamp': '1/1/2024', 'expires': '1/1/2026'},
+            {'name': 'B', 'timestamp': '7/1/2023', 'expires': '7/1/2024'},
+            {'name': 'C', 'timestamp': '6/30/2023', 'expires': '10/1/2024'}
+        ]},
+        TestReportEngine.training_records[2],
+        TestReportEngine.training_records[3],
+        TestReportEngine.training_records[4],
+        {'name': 'Joe', 'completions': [
+            {'name': 'D', 'timestamp': '8/1/2023', 'expires': '8/1/2024'}
+        ]}
+    ]
+    expected = {
+        'employees': {
+            'added': ['Joe'],
+            'removed': ['Jack'],
+            'changed': ['Jim']
+        },
+        'completion_totals': {},
+        'completion_by_year': {
+            'D': {'added': ['Joe'], 'removed': ['Jack']}
+        },
+        'expiration_by_date': [
+            {'name': 'Jim', 'program': 'A', 'old_status': 'expired',
+             'new_status': None},
+            {'name': 'Joe', 'program': 'D', 'old_status': None,
+             'new_status': 'expired'}
+        ]
+    }
+
+    def test_training_records(self):
+        self.assertEqual(
+            diff_snapshots(
+                Snapshot.from_training_records(self.old_records),
+                Snapshot.from_training_records(self.new_records),
+                2024, '10/1/2024'),
+            self.expected
+        )
+
+    def test_states(self):
+        old, new = (
+            Snapshot.from_state(
+                ReportState(2024, '10/1/2024').add_records(records))
+            for records in (self.old_records, self.new_records)
+        )
+        self.assertEqual(
+            diff_snapshots(old, new, 2024, '10/1/2024'), self.expected)
+
+    def test_unchanged_employees_skipped(self):
+        old = Snapshot.from_training_records(self.old_records)
+        new = Snapshot.from_training_records(self.new_records)
+        summaries = mock.Mock(side_effect=AssertionError('unchanged'))
+        old.summaries['John'] = new.summaries['John'] = summaries
+        diff_snapshots(old, new, 2024, '10/1/2024')
+
+
+class TestEmployeeIndex(unittest.TestCase):
+    training_records = TestReportEngine.training_records
+
+    def setUp(self):
+        self.index = EmployeeIndex(self.training_records)
+
+    def test_summary(self):
+        self.assertEqual(self.index.summary('Jim', '10/1/2024'), {
+            'name': 'Jim',
+            'programs': ['A', 'B', 'C'],
+            'fiscal_years': {2023: ['C'], 2024: ['A', 'B']},
+            'expired_training': generate_expiration_report_by_date(
+                self.training_records, '10/1/2024')[1]['expired_training']
+        })
+        self.assertEqual(self.index.summary('Jill', '10/1/2024')['programs'],
+                         [])
+        with self.assertRaises(KeyError):
+            self.index.summary('Nobody')
+        with self.assertRaises(ValueError):
+            self.index.summary('Jim', '10/32/2024')
+
+    def test_program_status(self):
+        self.assertEqual(
+            self.index.program_status('Jim', 'A', '10/1/2024'), 'expired')
+        self.assertEqual(
+            self.index.program_status('Jim', 'C', '10/1/2024'),
+            'expires soon')
+        self.assertEqual(
+            self.index.program_status('Jim', 'B', '10/1/2023'), 'current')
+        self.assertEqual(
+            self.index.program_status('Jim', 'D', '10/1/2024'),
+            'not completed')
+
+    def test_cache(self):
+        self.index.summary('Jim', '10/1/2024')
+        self.index.summary('Jim', '10/1/2024')
+        self.assertEqual(self.index.cached_summary.cache_info().hits, 1)
+
+        self.index.update([{'name': 'Jim', 'completions': [
+            {'name': 'A', 'timestamp': '1/1/2024', 'expires': '1/1/2026'}
+        ]}])
+        self.assertEqual(
+            self.index.program_status('Jim', 'A', '10/1/2024'), 'current')
+        self.assertEqual(
+            self.index.summary('Jim', '10/1/2024')['programs'], ['A'])
+
+
+class TestReportServer(unittest.TestCase):
+    training_records = TestReportEngine.training_records
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'trainings.json')
+        self.write(self.training_records)
+
+        dataset = server.ReportDataset(self.path)
+        self.server = server.ReportServer(('127.0.0.1', 0), dataset)
+        logging = mock.patch.object(server.ReportRequestHandler, 'log_message')
+        logging.start()
+        self.addCleanup(logging.stop)
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.start()
+
+        def stop():
+            self.server.shutdown()
+            self.server.server_close()
+            thread.join()
+        self.addCleanup(stop)
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, training_records):
+        with open(self.path, 'w') as file:
+            json.dump(training_records, file)
+
+    def request(self, path, method='GET'):
+        url = f'http://127.0.0.1:{self.server.server_port}{path}'
+        request = urllib.request.Request(url, method=method)
+        with urllib.request.urlopen(request) as response:
+            return response.read()
+
+    def test_reports(self):
+        self.assertEqual(
+            json.loads(self.request('/completion_totals')),
+            count_program_completions(
+                aggregate_training_programs(self.training_records),
+                self.training_records)
+        )
+        self.assertEqual(
+            json.loads(self.request(
+                '/completion_by_year?fiscal_year=2024&program=X&program=C')),
+            generate_completion_report_by_year(
+                self.training_records, 2024, ['X', 'C'])
+        )
+        self.assertEqual(
+            self.request('/expiration_by_date?expiration=10/1/2023'
+                         '&format=pretty').decode(),
+            json.dumps(generate_expiration_report_by_date(
+                self.training_records, '10/1/2023'), indent=4)
+        )
+
+    def test_page(self):
+        self.assertEqual(
+            json.loads(self.request(
+                '/expiration_by_date?expiration=10/1/2024&limit=2&offset=1')),
+            generate_expiration_report_by_date(
+                self.training_records, '10/1/2024')[1:3]
+        )
+        self.assertEqual(
+            json.loads(self.request(
+                '/completion_by_year?fiscal_year=2024&program=A&limit=1')),
+            {'A': ['Jim']}
+        )
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            self.request('/expiration_by_date?limit=2&sort=age')
+        self.assertEqual(context.exception.code, 400)
+
+    def test_cached_response(self):
+        path = '/expiration_by_date?expiration=10/1/2023'
+        self.request(path)
+        self.request(path)
+        self.assertEqual(self.server.dataset.response.cache_info().hits, 1)
+
+    def test_invalid_request(self):
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            self.request('/expiration_by_date?expiration=10/32/2023')
+        self.assertEqual(context.exception.code, 400)
+
+    def test_reload(self):
+        result = json.loads(self.request('/reload', 'POST'))
+        self.assertFalse(result['reloaded'])
+
+        self.write(self.training_records[:1])
+        os.utime(self.path, ns=(0, 0))
+        result = json.loads(self.request('/reload', 'POST'))
+        self.assertEqual(result, {'reloaded': True, 'employees': 1})
+
+
+class TestValidation(unittest.TestCase):
+    training_records = TestReportEngine.training_records + [
+        {'completions': []},
+        {'name': 'Joe', 'completions': [
+            {'timestamp': '1/1/2024', 'expires': None},
+            {'name': 'A', 'timestamp': '13/1/2023', 'expires': '9/31/2023'},
+            'B'
+        ]}
+    ]
+
+    def test_validate_record(self):
+        record, problems = validate_record(self.training_records[-1])
+        self.assertEqual(record, TrainingRecord(
+            'Joe', (Completion('A', None, None, None),)))
+        self.assertEqual(
+            [(problem['completion'], problem['reason'])
+             for problem in problems],
+            [
+                (0, 'missing program name'),
+                (1, 'invalid completion date'),
+                (1, 'invalid expiration date'),
+                (2, 'completion is not an object')
+            ]
+        )
+
+        record, _ = validate_record(self.training_records[0])
+        self.assertEqual(record.completions[0], Completion(
+            'A', datetime(2024, 1, 1), datetime(2024, 1, 1).toordinal(),
+            '1/1/2024'))
+
+    def test_quarantine(self):
+        quarantine = io.StringIO()
+        records = list(validate_training_records(
+            self.training_records, quarantine))
+        self.assertEqual(
+            [record.name for record in records],
+            [record['name'] for record in TestReportEngine.training_records]
+            + ['Joe']
+        )
+
+        problems = [json.loads(line) for line in quarantine.getvalue()
+                    .splitlines()]
+        self.assertEqual(len(problems), 5)
+        self.assertEqual(problems[0], {
+            'record': 5, 'name': None, 'completion': None,
+            'reason': 'missing employee name', 'value': {'completions': []}
+        })
+        self.assertEqual(problems[-1]['value'], 'B')
+
+    def test_quarantine_in_parallel(self):
+        # the workers validate their shards, the problems keep their order
+        expected = io.StringIO()
+        records = list(validate_training_records(
+            self.training_records, expected))
+        quarantine = io.StringIO()
+        engine = build_reports_in_parallel(
+            self.training_records, 2, 2024, '10/1/2024', shard_size=2,
+            quarantine=quarantine)
+        self.assertEqual(quarantine.getvalue(), expected.getvalue())
+        self.assertEqual(
+            engine.expiration_report(),
+            ReportEngine(2024, '10/1/2024').add_records(
+                records).expiration_report())
+
+    def test_reports(self):
+        # validated records produce the same reports as the raw ones
+        training_records = list(generate_training_records(
+            100, malformed_rate=0.5))
+        records = list(validate_training_records(training_records))
+        engine = ReportEngine(2022, '10/1/2022').add_records(records)
+        expected = ReportEngine(2022, '10/1/2022').add_records(
+            training_records)
+        self.assertEqual(
+            engine.completion_totals(), expected.completion_totals())
+        self.assertEqual(
+            engine.completion_report_by_year(),
+            expected.completion_report_by_year())
+        self.assertEqual(
+            engine.expiration_report(), expected.expiration_report())
+
+        state = ReportState(2022, '10/1/2022').add_records(records)
+        self.assertEqual(
+            state.expiration_report('10/1/2022'), expected.expiration_report())
+
+    def test_report_functions(self):
+        # the report functions accept validated records
+        records = list(validate_training_records(self.training_records))
+        programs = aggregate_training_programs(self.training_records)
+        self.assertEqual(aggregate_training_programs(records), programs)
+        self.assertEqual(
+            count_program_completions(programs, records),
+            count_program_completions(programs, self.training_records))
+        self.assertEqual(
+            generate_completion_report_by_year(records, 2024, programs),
+            generate_completion_report_by_year(
+                ProgramIndex(records), 2024, programs))
+        self.assertEqual(
+            generate_expiration_report_by_date(records, '10/1/2024'),
+            generate_expiration_report_by_date(
+                self.training_records, '10/1/2024'))
+        self.assertNotEqual(
+            generate_expiration_report_by_date(records, '10/1/2024'), [])
+        self.assertTrue(has_completed_training_program(
+            'A', records[0].completions))
+
+
 if __name__ == '__main__':
     unittest.main()
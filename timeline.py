@@ -0,0 +1,96 @@
+from bisect import bisect_left, bisect_right
+
+
+class ExpirationTimeline:
+    '''
+    Expiring completions of one training record, grouped by program and
+    sorted by expiration once, so the expired and expiring programs can be
+    looked up for any number of expiration dates without scanning and
+    sorting the completions again.
+
+    Parameters:
+        completions (iterable): completions in the order of the training
+        record, in the form of: (
+            'training program name (string)',
+            expiration date as day ordinal (int),
+            'date string in the format m/d/yyyy'
+        )
+    '''
+
+    def __init__(self, completions):
+        # program name -> [(day, position, string), ...] sorted by day
+        self.programs = {}
+        for position, (program, expires, label) in enumerate(completions):
+            self.programs.setdefault(program, []).append(
+                (expires, position, label))
+
+        self.days = {}
+        self.most_recent = {}
+        for program, entries in self.programs.items():
+            entries.sort()
+            days = [entry[0] for entry in entries]
+            self.days[program] = days
+            # first completion with the most recent expiration
+            self.most_recent[program] = entries[bisect_left(days, days[-1])]
+
+        # expired programs are listed by their oldest expiration
+        self.order = sorted(
+            self.programs, key=lambda program: self.programs[program][0][:2])
+
+    def expired_training(self, cutoff, expires_in_days=30, horizons=None):
+        '''
+        Same as expiration.expired_training for the completions of the
+        timeline, or expiration.tiered_expired_training if horizons are
+        given.
+
+        Parameters:
+            cutoff (int): expiration date as day ordinal
+            expires_in_days (int): time period in which experiation occurs
+            horizons (tuple): time periods in days, sorted and unique,
+            which replace expires_in_days
+
+        Returns:
+            list: list of programs, see expiration.expired_training
+        '''
+        programs = []
+        if not self.order:
+            return programs
+
+        periods = horizons or (expires_in_days,)
+        expiring_soon = []
+        for program in self.order:
+            expires, _, label = self.most_recent[program]
+            if expires < cutoff:
+                programs.append({
+                    'name': program,
+                    'expiration': label,
+                    'status': 'expired'
+                })
+                continue
+
+            # the tier is the shortest period the first completion
+            # expiring after the cutoff is within
+            days = self.days[program]
+            start = bisect_left(days, cutoff)
+            tier = bisect_left(periods, days[start] - cutoff)
+            if tier == len(periods):
+                continue
+            end = bisect_right(days, cutoff + periods[tier])
+            window = self.programs[program][start:end]
+            # listed by the first completion expiring soon, reported
+            # with the last one
+            first = min(entry[1] for entry in window)
+            label = max(window, key=lambda entry: entry[1])[2]
+            expiring_soon.append((tier, first, program, label))
+
+        for tier, _, program, label in sorted(expiring_soon):
+            entry = {
+                'name': program,
+                'expiration': label,
+                'status': 'expires soon'
+            }
+            if horizons:
+                entry['expires_in_days'] = horizons[tier]
+            programs.append(entry)
+
+        return programs
@@ -0,0 +1,136 @@
+from collections import namedtuple
+
+from dates import parse_date
+from writer import compact_encoder
+
+# A completion checked and parsed once: the program name is a non-empty
+# string, the completion date a datetime or None, and the expiration date a
+# day ordinal, with the date string it was written as, or both None.
+Completion = namedtuple(
+    'Completion', ('program', 'timestamp', 'expires', 'label'))
+
+# A training record with an employee name and a tuple of Completions.
+TrainingRecord = namedtuple('TrainingRecord', ('name', 'completions'))
+
+# reports of main.py: program totals (report 1), completions by fiscal year
+# (report 2) and expirations by date (report 3)
+REPORTS = ('totals', 'by_year', 'expiration')
+
+
+def validate_record(record, reports=REPORTS):
+    '''
+    Checks and parses a training record, see
+    main.ReportEngine.add_record for its form.
+
+    Rows that can't be reported are dropped: records without an employee
+    name, and completions without a program name. Dates that are present
+    but can't be parsed are dropped from their completion, which the
+    reports ignore the same way as a missing date. A completion without an
+    expiration date never expires, so a missing one isn't a problem.
+
+    Only the dates of the selected reports are parsed and checked: the
+    completion date for report 2 and the expiration date for report 3. The
+    dates that are not parsed are None.
+
+    Parameters:
+        record (dict): training record, or a TrainingRecord, which has
+        already been validated and is returned unchanged
+        reports (tuple): selected reports, any of REPORTS
+
+    Returns:
+        tuple: the TrainingRecord, None if the record was dropped, and a
+        list of problems in the form of: {
+            'completion': position of the completion, None for the record,
+            'reason': 'description of the problem (string)',
+            'value': the malformed record, completion or date
+        }
+    '''
+    problems = []
+
+    def problem(completion, reason, value):
+        problems.append(
+            {'completion': completion, 'reason': reason, 'value': value})
+
+    if isinstance(record, TrainingRecord):
+        return record, problems
+    if not isinstance(record, dict):
+        problem(None, 'record is not an object', record)
+        return None, problems
+    name = record.get('name')
+    if not isinstance(name, str):
+        problem(None, 'missing employee name', record)
+        return None, problems
+    completions = record.get('completions', [])
+    if not isinstance(completions, list):
+        problem(None, 'completions is not a list', completions)
+        return None, problems
+
+    valid = []
+    # a namedtuple is built faster from a tuple than from its fields
+    make = Completion._make
+    timestamps = 'by_year' in reports
+    expirations = 'expiration' in reports
+    for i, completion in enumerate(completions):
+        if not isinstance(completion, dict):
+            problem(i, 'completion is not an object', completion)
+            continue
+        program = completion.get('name')
+        if not program or not isinstance(program, str):
+            problem(i, 'missing program name', completion)
+            continue
+
+        timestamp = None
+        if timestamps:
+            value = completion.get('timestamp')
+            timestamp = parse_date(value)
+            if not timestamp:
+                problem(i, 'missing completion date' if value is None
+                        else 'invalid completion date', value)
+
+        expires = label = None
+        if expirations:
+            label = completion.get('expires')
+            expires = parse_date(label)
+            if expires:
+                expires = expires.toordinal()
+            elif label is not None:
+                problem(i, 'invalid expiration date', label)
+                label = None
+
+        valid.append(make((program, timestamp, expires, label)))
+
+    return TrainingRecord(name, tuple(valid)), problems
+
+
+def validate_training_records(training_records, quarantine=None,
+                              reports=REPORTS, start=0):
+    '''
+    Validates training records once, upfront, so the reports are built from
+    clean, typed records, see validate_record. Problems are written to the
+    quarantine file as JSON Lines, one line per problem in the form of: {
+        'record': position of the training record,
+        'name': 'employee name, if the record has one',
+        'completion': position of the completion, None for the record,
+        'reason': 'description of the problem (string)',
+        'value': the malformed record, completion or date
+    }
+
+    Parameters:
+        training_records (iterable): training records
+        quarantine (file): open text file for the problems, or None to
+        discard them
+        reports (tuple): selected reports, see validate_record
+        start (int): position of the first training record
+
+    Returns:
+        iterator: TrainingRecords in the order of the training records
+    '''
+    for position, record in enumerate(training_records, start):
+        valid, problems = validate_record(record, reports)
+        if quarantine is not None:
+            name = record.get('name') if isinstance(record, dict) else None
+            for problem in problems:
+                quarantine.write(compact_encoder.encode(
+                    {'record': position, 'name': name, **problem}) + '\n')
+        if valid is not None:
+            yield valid
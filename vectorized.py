@@ -0,0 +1,105 @@
+from columnar import NULL_DATE
+from dates import date_ordinal
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def expiration_report(store, expiration, expires_in_days=30):
+    '''
+    Vectorized version of main.generate_expiration_report_by_date, which
+    works on the flattened (employee, program, expires) columns of a
+    completion store instead of looping over every completion in Python.
+
+    The most recent expiration of every (employee, program) pair is found
+    with grouped reductions over sorted arrays and compared against the
+    expiration date, and completions expiring soon are found with a single
+    array comparison. Falls back to the pure Python implementation of the
+    store if NumPy is not installed.
+
+    Parameters:
+        store (CompletionStore): completion store built from the training
+        records
+        expiration (str): date string in the format m/d/yyyy
+        expires_in_days (int): time period in which experiation occurs
+
+    Returns:
+        list: report 3, see main.generate_expiration_report_by_date
+    '''
+    if np is None:
+        return store.expiration_report(expiration, expires_in_days)
+
+    cutoff = date_ordinal(expiration)
+    offsets = _column(store.record_offsets, np.int64)
+    program = _column(store.program, np.int32)
+    expires = _column(store.expires, np.int32)
+    named = np.array([bool(name) for name in store.programs], dtype=bool)
+
+    # ignore completions that can't expire or have no program name
+    rows = np.flatnonzero((expires != NULL_DATE) & named[program])
+    record = np.repeat(np.arange(len(store)), np.diff(offsets))[rows]
+    program = program[rows].astype(np.int64)
+    expires = expires[rows].astype(np.int64)
+    group = record * len(store.programs) + program
+
+    # most recent expiration of each (employee, program), first row on ties,
+    # and the oldest expiration, which determines the order of the programs
+    latest = _group_bounds(group, np.lexsort((rows, -expires, group)))[0]
+    oldest = _group_bounds(group, np.lexsort((rows, expires, group)))[0]
+    expired = expires[latest] < cutoff
+    latest, oldest = latest[expired], oldest[expired]
+
+    # first and last row of each (employee, program) expiring soon
+    soon = np.flatnonzero(
+        (expires >= cutoff) & (expires <= cutoff + expires_in_days))
+    first, last = _group_bounds(
+        group, soon[np.argsort(group[soon], kind='stable')])
+
+    # expired programs are listed before programs expiring soon
+    entry_record = np.concatenate((record[latest], record[first]))
+    entry_status = np.repeat([0, 1], [len(latest), len(first)])
+    entry_order = np.concatenate((expires[oldest], rows[first]))
+    entry_tiebreak = np.concatenate((rows[oldest], np.zeros(len(first), int)))
+    entry_program = np.concatenate((program[latest], program[first]))
+    entry_label = np.concatenate((rows[latest], rows[last]))
+    order = np.lexsort(
+        (entry_tiebreak, entry_order, entry_status, entry_record))
+
+    report = []
+    status_names = ('expired', 'expires soon')
+    previous = None
+    for record, status, program, label in zip(
+            entry_record[order].tolist(), entry_status[order].tolist(),
+            entry_program[order].tolist(), entry_label[order].tolist()):
+        if record != previous:
+            previous = record
+            programs = []
+            report.append({
+                'name': store.employees[store.record_employee[record]],
+                'expired_training': programs
+            })
+        programs.append({
+            'name': store.programs[program],
+            'expiration': store.expires_label(label),
+            'status': status_names[status]
+        })
+
+    return sorted(report, key=lambda x: x['name'])
+
+
+def _column(values, dtype):
+    # zero copy view of an array.array column
+    return np.frombuffer(values, dtype=dtype) if len(values) else \
+        np.zeros(0, dtype=dtype)
+
+
+def _group_bounds(group, order):
+    # first and last element of each group in the sort order
+    if not len(order):
+        return order, order
+    boundaries = group[order[1:]] != group[order[:-1]]
+    starts = np.append(True, boundaries)
+    ends = np.append(boundaries, True)
+    return order[starts], order[ends]
@@ -0,0 +1,186 @@
+import json
+import os
+from contextlib import contextmanager
+from json.encoder import encode_basestring_ascii
+
+FORMATS = ('pretty', 'compact', 'jsonl')
+
+INDENT = ' ' * 4
+
+# C accelerated encoder for the compact formats
+compact_encoder = json.JSONEncoder(separators=(',', ':'), default=str)
+
+
+@contextmanager
+def atomic_open(path, mode='w'):
+    '''
+    Opens a temporary file next to path, which replaces path when the block
+    completes, or is removed if it fails. Each writer has its own uniquely
+    named temporary file, so concurrent writers of the same path never
+    interfere, and readers never see a partially written file.
+
+    Parameters:
+        path (str): path to the file
+        mode (str): 'w' for text or 'wb' for binary
+
+    Returns:
+        file: open temporary file
+    '''
+    # created exclusively under a random name, with the permissions of a
+    # file created with open, which the kernel restricts by the umask
+    while True:
+        temporary_path = f'{path}.{os.urandom(8).hex()}.tmp'
+        try:
+            descriptor = os.open(
+                temporary_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666)
+            break
+        except FileExistsError:
+            continue
+
+    try:
+        with open(descriptor, mode) as file:
+            yield file
+        os.replace(temporary_path, path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+
+
+def write_report(path, report, format='pretty'):
+    '''
+    Writes a report one entry at a time, so a report given as an iterator
+    is never held in memory as a whole. The report is written to a temporary
+    file first and renamed when complete, so readers never see a partially
+    written report.
+
+    Parameters:
+        path (str): path to the report file
+        report (dict | iterable): report as a dict, or a list or iterator of
+        report entries
+        format (str): 'pretty' writes the same bytes as
+        json.dump(report, file, indent=4, default=str), 'compact' writes
+        JSON without whitespace and 'jsonl' writes one entry per line, or
+        one {key: value} object per line for a dict
+    '''
+    chunks = iter_report(report, format)
+
+    with atomic_open(path) as file:
+        file.writelines(chunks)
+
+
+def iter_report(report, format='pretty'):
+    '''
+    Returns:
+        iterator: strings of the report in the format, see write_report
+
+    Raises:
+        ValueError: if the format is unknown
+    '''
+    if format == 'pretty':
+        return iter_pretty(report)
+    if format == 'compact':
+        return iter_compact(report)
+    if format == 'jsonl':
+        return iter_json_lines(report)
+    raise ValueError(f'unknown report format: {format}')
+
+
+def iter_pretty(report):
+    '''
+    Returns:
+        iterator: strings of the report indented by 4 spaces
+    '''
+    if isinstance(report, dict):
+        opening, closing = '{', '}'
+        entries = (
+            _encode_key(key) + ': ' + encode_pretty(value, 1)
+            for key, value in report.items()
+        )
+    else:
+        opening, closing = '[', ']'
+        entries = (encode_pretty(entry, 1) for entry in report)
+
+    separator = '\n' + INDENT
+    empty = True
+    for entry in entries:
+        yield (opening if empty else ',') + separator + entry
+        empty = False
+    yield opening + closing if empty else '\n' + closing
+
+
+def iter_compact(report):
+    '''
+    Returns:
+        iterator: strings of the report without whitespace
+    '''
+    encode = compact_encoder.encode
+    if isinstance(report, dict):
+        opening, closing = '{', '}'
+        entries = (
+            encode(_key_string(key)) + ':' + encode(value)
+            for key, value in report.items()
+        )
+    else:
+        opening, closing = '[', ']'
+        entries = map(encode, report)
+
+    yield opening
+    for i, entry in enumerate(entries):
+        yield ',' + entry if i else entry
+    yield closing
+
+
+def iter_json_lines(report):
+    '''
+    Returns:
+        iterator: lines of the report, each one a JSON value
+    '''
+    encode = compact_encoder.encode
+    if isinstance(report, dict):
+        report = ({key: value} for key, value in report.items())
+    for entry in report:
+        yield encode(entry) + '\n'
+
+
+def encode_pretty(value, level=0):
+    '''
+    Encodes a value like json.dumps(value, indent=4, default=str) at the
+    given indentation level. The report values are dicts, lists, strings and
+    numbers only, which are encoded directly rather than through the pure
+    Python encoder json.dumps falls back to when indenting.
+
+    Returns:
+        str: JSON string of the value
+    '''
+    if isinstance(value, str):
+        return encode_basestring_ascii(value)
+    if isinstance(value, dict):
+        if not value:
+            return '{}'
+        separator = '\n' + INDENT * (level + 1)
+        return '{' + separator + (',' + separator).join(
+            _encode_key(key) + ': ' + encode_pretty(item, level + 1)
+            for key, item in value.items()
+        ) + '\n' + INDENT * level + '}'
+    if isinstance(value, (list, tuple)):
+        if not value:
+            return '[]'
+        separator = '\n' + INDENT * (level + 1)
+        return '[' + separator + (',' + separator).join(
+            encode_pretty(item, level + 1) for item in value
+        ) + '\n' + INDENT * level + ']'
+    if value is None or isinstance(value, (bool, int, float)):
+        return json.dumps(value)
+    return encode_basestring_ascii(str(value))
+
+
+def _key_string(key):
+    # dict keys are converted to strings the way json.dumps does
+    if isinstance(key, str):
+        return key
+    return json.dumps(key)
+
+
+def _encode_key(key):
+    return encode_basestring_ascii(_key_string(key))